@@ -1,14 +1,29 @@
 from pathlib import Path
 import sqlite3
 
+from multi_domain_platform.services.db_profiles import PROFILES, apply_profile, read_active_settings, resolve_profile
+
 DATA_DIR = Path("DATA")
 DB_PATH = DATA_DIR / "intelligence_platform.db"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-def connect_database(db_path=DB_PATH):
-    """Return a connection to the SQLite database."""
-    return sqlite3.connect(str(db_path))
+# PRAGMA presets applied to every connection, shared with the platform's DatabaseManager
+PERFORMANCE_PROFILES = PROFILES
+
+def connect_database(db_path=DB_PATH, profile="balanced"):
+    """
+    Return a connection to the SQLite database with a performance profile applied.
+    `profile` is a preset name or a dict of overrides; unknown names or invalid values raise ValueError.
+    """
+    settings = resolve_profile(profile)
+    conn = sqlite3.connect(str(db_path))
+    apply_profile(conn, settings)
+    return conn
+
+def get_active_settings(conn):
+    """Return the performance PRAGMAs currently in effect on a connection (synchronous and temp_store by name)."""
+    return read_active_settings(conn)
 
 # 🔥 THIS PART ACTUALLY CREATES THE DATABASE FILE
 conn = connect_database()
@@ -21,6 +21,16 @@ def get_all_incidents(conn):
     return df
     pass
 
+def iter_incidents(chunk_size=10000):
+    """Yield all incidents as DataFrame chunks so large tables are never fully loaded."""
+    conn = connect_database()
+    try:
+        yield from pd.read_sql_query(
+            "SELECT * FROM cyber_incidents ORDER BY id DESC", conn, chunksize=chunk_size
+        )
+    finally:
+        conn.close()
+
 def update_incident_status(conn, incident_id, new_status):
     """Update the status of an incident."""
     conn = connect_database()
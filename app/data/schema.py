@@ -6,7 +6,7 @@ def create_user_table(conn):
     """Create users table."""
     cursor = conn.cursor()
     cursor.execute(
-        """CREATE TABLE IF NOT EXISTS datasets_metadata (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, description TEXT,created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+        """CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE, password_hash TEXT NOT NULL, role TEXT DEFAULT 'user', created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
     conn.commit()
 
 
@@ -1,7 +1,14 @@
+import math
+import os
+import time
+
 import streamlit as st
+import pandas as pd
 # External services required for authentication
 from services.database_manager import DatabaseManager 
 from services.auth_manager import AuthManager 
+from services.password_hasher import HasherBusyError, HasherTimeoutError
+from services.rate_limiter import RateLimitedError
 
 # Initialize services
 db = DatabaseManager("intelligence_platform.db")
@@ -19,12 +26,124 @@ if "username" not in st.session_state:
 
 st.title("🔐 Multi domain Platform")
 
+
+def display_query_admin_panel():
+    """Sidebar panel listing the slowest query fingerprints and the recent slow-query log."""
+    with st.sidebar.expander("🛠️ Database Query Stats"):
+        sort_by = st.selectbox("Rank by", ["total_ms", "p95_ms", "p99_ms", "calls", "rows"], key="query_stats_sort")
+        top = db.query_stats(limit=10, sort_by=sort_by)
+        if top:
+            st.dataframe(
+                pd.DataFrame(top).reindex(
+                    columns=["query", "calls", "errors", "rows", "total_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+                ),
+                use_container_width=True,
+            )
+        else:
+            st.caption("No queries recorded yet.")
+
+        slow = db.slow_queries(limit=10)
+        st.caption(f"Slow-query log: {len(slow)} recent entries")
+        for entry in slow:
+            st.code(f"{entry['at']} · {entry['ms']} ms · {entry['rows']} rows\n{entry['query']}\n-- plan: " + "; ".join(entry["plan"]), language="sql")
+
+        if st.button("Reset stats", key="query_stats_reset"):
+            db.reset_query_stats()
+            st.rerun()
+
+
+def display_login_stats_panel():
+    """Sidebar panel with login outcomes, rate-limit rejections and bcrypt pool load."""
+    with st.sidebar.expander("🔒 Login Protection"):
+        stats = auth.login_stats()
+        col1, col2 = st.columns(2)
+        col1.metric("Succeeded", stats["succeeded"])
+        col2.metric("Failed", stats["failed"])
+        col1.metric("Limited (client)", stats["rejected_client"])
+        col2.metric("Limited (user)", stats["rejected_username"])
+        col1.metric("Rejected (busy)", stats["rejected_busy"])
+        col2.metric("Login p95", f"{stats.get('p95_ms', 0)} ms")
+        st.caption(f"bcrypt pool: {stats['bcrypt_pool']}")
+
+
+def display_snapshot_panel():
+    """Sidebar panel that starts an online snapshot in the background and shows its progress."""
+    with st.sidebar.expander("💾 Database Snapshot"):
+        compact = st.checkbox("Compact (VACUUM INTO)", key="snapshot_compact")
+        if st.button("Create snapshot", key="snapshot_start"):
+            os.makedirs("snapshots", exist_ok=True)
+            dest = os.path.join("snapshots", f"intelligence_platform-{time.strftime('%Y%m%d-%H%M%S')}.db")
+            st.session_state.snapshot_job = db.snapshot(dest, compact=compact)
+
+        job = st.session_state.get("snapshot_job")
+        if job is None:
+            return
+        info = job.info()
+        if info["status"] == "running":
+            st.progress(info["progress"] or 0.0, text=f"Copying… {info['elapsed_s']} s")
+            st.button("Refresh", key="snapshot_refresh")
+        elif info["status"] == "done":
+            st.success(f"Saved {info['dest']} ({info['size_bytes'] / 1024 ** 2:.1f} MB in {info['elapsed_s']} s)")
+        else:
+            st.error(f"Snapshot failed: {info['error']}")
+
+
+SEARCH_DOMAIN_LABELS = {
+    "security_incidents": "🛡️ Incident",
+    "it_tickets": "💻 Ticket",
+    "ml_experiments": "📊 Experiment",
+}
+SEARCH_PAGE_SIZE = 20
+
+
+def display_global_search():
+    """Search box over every domain (FTS5), with ranked, highlighted and paginated results."""
+    st.subheader("🔎 Search all domains")
+
+    def reset_search_page():
+        st.session_state.search_offset = 0
+
+    if "search_offset" not in st.session_state:
+        st.session_state.search_offset = 0
+    text = st.text_input(
+        "Search incidents, tickets and experiments",
+        key="global_search", placeholder="e.g. phishing vpn", on_change=reset_search_page,
+    )
+    if not text.strip():
+        return
+
+    offset = st.session_state.search_offset
+    # One extra result tells us whether there is a next page
+    results = db.search(text, limit=SEARCH_PAGE_SIZE + 1, offset=offset)
+    has_next = len(results) > SEARCH_PAGE_SIZE
+    results = results.iloc[:SEARCH_PAGE_SIZE]
+
+    if results.empty:
+        st.info("No matches.")
+        return
+    for row in results.itertuples(index=False):
+        st.markdown(f"**{SEARCH_DOMAIN_LABELS.get(row.domain, row.domain)} #{row.id}** — {row.snippet}")
+
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("◀ Previous", key="search_prev", disabled=offset == 0):
+        st.session_state.search_offset = max(0, offset - SEARCH_PAGE_SIZE)
+        st.rerun()
+    info_col.caption(f"Results {offset + 1}–{offset + len(results)}")
+    if next_col.button("Next ▶", key="search_next", disabled=not has_next):
+        st.session_state.search_offset = offset + SEARCH_PAGE_SIZE
+        st.rerun()
+
+
 # --- Logged-In State ---
 if st.session_state.logged_in:
+    display_query_admin_panel()
+    display_login_stats_panel()
+    display_snapshot_panel()
     st.success(f"Already logged in as **{st.session_state.username}**.")
     if st.button("Go to dashboard"):
         # SWITCHED TO CYBERSECURITY PAGE PATH
         st.switch_page("pages/_🛡️ _Cybersecurity.py") 
+    display_global_search()
     st.stop()
 
 
@@ -38,7 +157,16 @@ with tab_login:
     login_password = st.text_input("Password", type="password", key="login_password")
 
     if st.button("Log in", type="primary"):
-        if auth.login(login_username, login_password):
+        try:
+            # The client address (when Streamlit knows it) gets its own attempt budget
+            logged_in = auth.login(login_username, login_password, client=getattr(st.context, "ip_address", None))
+        except RateLimitedError as e:
+            st.warning(f"{e} Try again in {math.ceil(e.retry_after)} s.")
+            st.stop()
+        except (HasherBusyError, HasherTimeoutError):
+            st.warning("The server is handling many logins right now. Please try again in a few seconds.")
+            st.stop()
+        if logged_in:
             st.session_state.logged_in = True
             st.session_state.username = login_username
             st.success(f"Welcome back, {login_username}! ")
@@ -76,7 +204,12 @@ with tab_register:
             
         # 3. Attempt registration
         if validation_passed:
-            if auth.register_user(new_username, new_password):
+            try:
+                registered = auth.register_user(new_username, new_password)
+            except (HasherBusyError, HasherTimeoutError):
+                st.warning("The server is busy right now. Please try again in a few seconds.")
+                st.stop()
+            if registered:
                 st.success("Account created! You can now log in.")
                 st.info("Tip: go to the Login tab and sign in.")
             else:
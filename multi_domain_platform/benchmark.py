@@ -0,0 +1,401 @@
+"""
+Micro-benchmarks for the database layer.
+
+Run from the multi_domain_platform folder:
+
+    python benchmark.py            # run every benchmark
+    python benchmark.py pool       # run a single benchmark by name
+
+Every benchmark works on a throwaway database in a temporary folder, so the
+real intelligence_platform.db is never touched.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import bcrypt
+import numpy as np
+import pandas as pd
+
+from models.batches import IncidentBatch
+from services.database_manager import DatabaseManager
+from services.auth_manager import AuthManager
+from services.password_hasher import HasherBusyError, HasherTimeoutError, PasswordHasher
+from services.rate_limiter import RateLimitedError
+from services.repositories import IncidentRepository, record_factory, record_type
+from services.risk_scoring import (
+    AGE_SATURATION_DAYS, AGE_SHARE, DEFAULT_TYPE_WEIGHT, INCIDENT_TYPE_WEIGHTS, SEVERITY_SHARE, STATUS_WEIGHTS,
+    TYPE_SHARE, top_risk_incidents,
+)
+
+
+def _temp_db_path(name):
+    """Returns a fresh database path inside a temporary folder."""
+    folder = tempfile.mkdtemp(prefix="mdp_bench_")
+    return os.path.join(folder, name)
+
+
+def _seed_incidents(db_path, num_records):
+    """Fills security_incidents with simple synthetic rows."""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO security_incidents (incident_type, severity, status, description, timestamp) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            ("Phishing Attempt", "High", "Open", f"Synthetic incident {i}", "2025-01-01 00:00:00")
+            for i in range(num_records)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _report(label, seconds, count):
+    print(f"  {label:<38} {seconds / count * 1e6:10.1f} us/query")
+
+
+# --- Connection Pool ---
+
+def bench_pool(num_queries=5000, num_threads=8):
+    """Per-query latency of a small indexed lookup: connect-per-query vs pooled."""
+    db_path = _temp_db_path("pool.db")
+    db = DatabaseManager(db_path)
+    _seed_incidents(db_path, 1000)
+    query = "SELECT id, severity, status FROM security_incidents WHERE id = ?"
+
+    print(f"Connection pool ({num_queries} point queries)")
+
+    def connect_per_query(n):
+        for i in range(n):
+            conn = sqlite3.connect(db_path)
+            try:
+                conn.execute(query, (i % 1000 + 1,)).fetchall()
+            finally:
+                conn.close()
+
+    def pooled(n):
+        for i in range(n):
+            db.fetch_all(query, (i % 1000 + 1,))
+
+    for label, worker in (("connect per query (before)", connect_per_query), ("pooled fetch_all (after)", pooled)):
+        start = time.perf_counter()
+        worker(num_queries)
+        _report(f"{label}, 1 thread", time.perf_counter() - start, num_queries)
+
+        per_thread = num_queries // num_threads
+        threads = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(num_threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        _report(f"{label}, {num_threads} threads", time.perf_counter() - start, per_thread * num_threads)
+
+    print(f"  pool stats: {db.pool_stats()}")
+
+
+# --- Bulk Insert ---
+
+def _synthetic_incidents(num_records):
+    """Yields cheap synthetic incident tuples (no Faker, so only the DB cost is measured)."""
+    for i in range(num_records):
+        yield ("Phishing Attempt", "High", "Open", f"Synthetic incident {i}", "2025-01-01 00:00:00")
+
+
+def bench_bulk(per_row_records=2000, bulk_sizes=(10_000, 1_000_000)):
+    """Seeding throughput: one execute_query (and commit) per row vs bulk_insert."""
+    columns = ["incident_type", "severity", "status", "description", "timestamp"]
+    insert_query = (
+        "INSERT INTO security_incidents (incident_type, severity, status, description, timestamp) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+    print("Bulk insert")
+
+    for profile in ("durable", "balanced"):
+        db = DatabaseManager(_temp_db_path(f"per_row_{profile}.db"), profile=profile)
+        start = time.perf_counter()
+        for record in _synthetic_incidents(per_row_records):
+            db.execute_query(insert_query, record)
+        elapsed = time.perf_counter() - start
+        print(f"  execute_query per row ({profile:<8})    {per_row_records:>9} rows {elapsed:8.2f} s "
+              f"({per_row_records / elapsed:>10.0f} rows/s)")
+
+    for num_records in bulk_sizes:
+        db = DatabaseManager(_temp_db_path(f"bulk_{num_records}.db"))
+        start = time.perf_counter()
+        inserted = db.bulk_insert("security_incidents", columns, _synthetic_incidents(num_records))
+        elapsed = time.perf_counter() - start
+        print(f"  bulk_insert (balanced)              {inserted:>9} rows {elapsed:8.2f} s "
+              f"({inserted / elapsed:>10.0f} rows/s)")
+
+
+# --- Transactions ---
+
+def bench_transaction(num_writes=1000):
+    """N status updates committed one by one vs grouped in db.transaction()."""
+    print(f"Unit of work ({num_writes} UPDATEs, durable profile)")
+    db = DatabaseManager(_temp_db_path("transaction.db"), profile="durable")
+    _seed_incidents(db.db_name, num_writes)
+    query = "UPDATE security_incidents SET status = ? WHERE id = ?"
+
+    start = time.perf_counter()
+    for i in range(num_writes):
+        db.execute_query(query, ("In Progress", i + 1))
+    _report("one commit per execute_query", time.perf_counter() - start, num_writes)
+
+    start = time.perf_counter()
+    with db.transaction():
+        for i in range(num_writes):
+            db.execute_query(query, ("Closed", i + 1))
+    _report("single db.transaction()", time.perf_counter() - start, num_writes)
+
+
+# --- Columnar Fetch ---
+
+def _measure(func):
+    """Runs func() once timed and once under tracemalloc; returns (seconds, peak traced MB)."""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak / 1024 ** 2
+
+
+def bench_fetch(sizes=(100_000, 1_000_000)):
+    """Building the incidents DataFrame: pd.DataFrame(fetch_all) vs fetch_frame."""
+    query = "SELECT id, timestamp, incident_type, severity, status, description FROM security_incidents"
+    print("Columnar fetch (time and peak Python memory while building the DataFrame)")
+    for num_records in sizes:
+        db = DatabaseManager(_temp_db_path(f"fetch_{num_records}.db"))
+        _seed_incidents(db.db_name, num_records)
+        for label, loader in (
+            ("pd.DataFrame(fetch_all) (before)", lambda: pd.DataFrame(db.fetch_all(query))),
+            ("fetch_frame (after)", lambda: db.fetch_frame(query)),
+        ):
+            elapsed, peak_mb = _measure(loader)
+            print(f"  {num_records:>9} rows  {label:<34} {elapsed:6.2f} s  peak {peak_mb:8.1f} MB")
+
+
+# --- Model Objects ---
+
+def bench_models(num_records=1_000_000):
+    """Memory per loaded incident: dict rows (fetch_all) vs __slots__ models vs namedtuple records."""
+    print(f"Row objects ({num_records} incidents; time, peak Python memory and bytes per row)")
+    db = DatabaseManager(_temp_db_path("models.db"))
+    _seed_incidents(db.db_name, num_records)
+    repository = IncidentRepository(db, batch_size=10000)
+    query = repository._select()
+    IncidentRecord = record_type("IncidentRecord", repository.columns)
+    for label, loader in (
+        ("dict rows, fetch_all (before)", lambda sql: db.fetch_all(sql)),
+        ("SecurityIncident __slots__", lambda sql: db.fetch_objects(sql, (), repository.factory, 10000)),
+        ("namedtuple records", lambda sql: db.fetch_objects(sql, (), record_factory(IncidentRecord), 10000)),
+    ):
+        elapsed, peak_mb = _measure(lambda: loader(query))
+        sample = loader(f"{query} LIMIT 1")[0]
+        print(f"  {label:<30} {elapsed:6.2f} s  peak {peak_mb:8.1f} MB  "
+              f"{peak_mb * 1024 ** 2 / num_records:6.0f} B/row  (object itself {sys.getsizeof(sample)} B)")
+
+
+# --- Risk Scoring ---
+
+def bench_risk(num_records=1_000_000, top=10):
+    """Top-N highest-risk open incidents: per-object scoring and sort vs NumPy scores and argpartition."""
+    print(f"Risk scoring ({num_records} incidents, top {top})")
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(0, 86400 * 280, num_records).astype("timedelta64[s]")
+    batch = IncidentBatch.from_columns({
+        "id": np.arange(1, num_records + 1),
+        "incident_type": rng.choice([name.title() for name in INCIDENT_TYPE_WEIGHTS], num_records),
+        "severity": rng.choice(["Critical", "High", "Medium", "Low"], num_records),
+        "status": rng.choice(["Open", "In Progress", "Closed", "Pending Review"], num_records),
+        "description": np.full(num_records, "Synthetic incident", dtype=object),
+        "timestamp": (np.datetime64("2025-01-01") + offsets).astype(str),
+    })
+    incidents = list(batch)
+    now = np.datetime64("now")
+
+    def per_object():
+        scored = []
+        for incident in incidents:
+            status_weight = STATUS_WEIGHTS.get(incident.get_status().lower(), 1.0)
+            if status_weight == 0:
+                continue
+            age = min(max((now - incident.get_timestamp()) / np.timedelta64(1, "D") / AGE_SATURATION_DAYS, 0.0), 1.0)
+            score = status_weight * (
+                SEVERITY_SHARE * incident.get_severity_level() / 4
+                + TYPE_SHARE * INCIDENT_TYPE_WEIGHTS.get(incident.get_incident_type().lower(), DEFAULT_TYPE_WEIGHT)
+                + AGE_SHARE * age
+            ) * 100
+            scored.append((score, incident))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored[:top]
+
+    for label, worker in (
+        ("per-object loop + sort (before)", per_object),
+        ("NumPy scores + argpartition (after)", lambda: top_risk_incidents(batch, top, now)),
+    ):
+        start = time.perf_counter()
+        worker()
+        print(f"  {label:<38} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+
+# --- Password Hashing ---
+
+def _ms_percentiles(seconds):
+    ordered = sorted(seconds)
+    if not ordered:
+        return float("nan"), float("nan")
+    return ordered[len(ordered) // 2] * 1000, ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+
+
+def bench_auth(num_logins=16):
+    """
+    A burst of concurrent logins: bcrypt inline on each session thread vs the bounded
+    PasswordHasher pool. Also times a small dashboard query run meanwhile by another session.
+
+    The pool's queue is sized to hold the whole burst so both modes complete every login;
+    any rejection is still counted, and latencies cover completed logins only.
+    """
+    print(f"Login burst ({num_logins} concurrent bcrypt checks, {os.cpu_count()} cores)")
+    db = DatabaseManager(_temp_db_path("auth.db"))
+    _seed_incidents(db.db_name, 1000)
+    password_hash = bcrypt.hashpw(b"Password123", bcrypt.gensalt()).decode()
+    workers = os.cpu_count() or 1
+    hasher = PasswordHasher(workers=workers, max_pending=max(num_logins - workers, 0))
+    probe_query = "SELECT severity, COUNT(*) FROM security_incidents GROUP BY severity"
+
+    def inline_check():
+        return bcrypt.checkpw(b"Password123", password_hash.encode())
+
+    def pooled_check():
+        return hasher.check("Password123", password_hash)
+
+    for label, check in (("inline on session threads (before)", inline_check), ("PasswordHasher pool (after)", pooled_check)):
+        login_times, probe_times, rejected = [], [], []
+        done = threading.Event()
+
+        def login():
+            start = time.perf_counter()
+            try:
+                check()
+            except (HasherBusyError, HasherTimeoutError) as e:
+                rejected.append(type(e).__name__)
+                return
+            login_times.append(time.perf_counter() - start)
+
+        def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                db.fetch_all(probe_query)
+                probe_times.append(time.perf_counter() - start)
+                time.sleep(0.01)
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        threads = [threading.Thread(target=login) for _ in range(num_logins)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        prober.join()
+
+        login_p50, login_p95 = _ms_percentiles(login_times)
+        probe_p50, probe_p95 = _ms_percentiles(probe_times)
+        print(f"  {label:<36} burst {elapsed:5.2f} s  completed {len(login_times):>3}  rejected {len(rejected):>3}  "
+              f"login p50 {login_p50:7.0f} ms  p95 {login_p95:7.0f} ms  "
+              f"dashboard query p50 {probe_p50:6.1f} ms  p95 {probe_p95:6.1f} ms")
+    print(f"  hasher stats: {hasher.stats()}")
+    hasher.shutdown()
+
+
+def bench_login_limits(num_attempts=2000):
+    """A credential-stuffing burst from one client: how many attempts reach bcrypt, and what a rejection costs."""
+    print(f"Login rate limits ({num_attempts} attempts from one client against one account)")
+    db = DatabaseManager(_temp_db_path("limits.db"))
+    auth = AuthManager(db, hasher=PasswordHasher())
+    auth.username_limiter.reset()
+    auth.client_limiter.reset()
+    auth.register_user("victim", "Password123")
+
+    rejected_seconds = []
+    start = time.perf_counter()
+    for i in range(num_attempts):
+        attempt = time.perf_counter()
+        try:
+            auth.login("victim", f"guess{i}", client="203.0.113.7")
+        except RateLimitedError:
+            rejected_seconds.append(time.perf_counter() - attempt)
+    elapsed = time.perf_counter() - start
+    stats = auth.login_stats()
+    print(f"  {num_attempts} attempts in {elapsed:.2f} s: {stats['bcrypt_pool']['completed'] - 1} reached bcrypt, "
+          f"{len(rejected_seconds)} rejected at {sum(rejected_seconds) / len(rejected_seconds) * 1e6:.1f} us each")
+    print(f"  login stats: { {key: value for key, value in stats.items() if not isinstance(value, dict)} }")
+
+
+# --- Write-Behind Group Commit ---
+
+def bench_write_behind(num_threads=16, writes_per_thread=200):
+    """Sustained concurrent execute_query throughput: direct commits vs write-behind group commit."""
+    print(f"Concurrent writes ({num_threads} threads x {writes_per_thread} INSERTs, durable profile)")
+    insert_query = (
+        "INSERT INTO it_tickets (title, severity, status) VALUES (?, 'Low', 'Open')"
+    )
+    for write_behind in (False, True):
+        db = DatabaseManager(
+            _temp_db_path(f"writes_{write_behind}.db"), pool_size=num_threads,
+            profile="durable", write_behind=write_behind
+        )
+        failures = []
+
+        def worker():
+            for i in range(writes_per_thread):
+                rowcount, _ = db.execute_query(insert_query, (f"ticket {i}",))
+                if rowcount != 1:
+                    failures.append(i)
+
+        threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total = num_threads * writes_per_thread
+        label = "write-behind (after)" if write_behind else "direct commit (before)"
+        print(f"  {label:<24} {total / elapsed:10.0f} writes/s  failed: {len(failures)}")
+        if write_behind:
+            print(f"  writer stats: {db.writer_stats()}")
+
+
+BENCHMARKS = {
+    "pool": bench_pool,
+    "bulk": bench_bulk,
+    "transaction": bench_transaction,
+    "fetch": bench_fetch,
+    "models": bench_models,
+    "risk": bench_risk,
+    "auth": bench_auth,
+    "limits": bench_login_limits,
+    "writes": bench_write_behind,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
+        print()
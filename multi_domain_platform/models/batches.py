@@ -0,0 +1,279 @@
+"""
+Columnar collections of domain records.
+
+A batch stores each field of many records as one NumPy array instead of one Python object
+per record. Low-cardinality text fields (severity, status, ...) are kept as categorical
+codes plus a small array of categories, so filtering and scoring compare small integers
+and per-category work (like mapping a severity name to a level) is done once per category
+instead of once per row. Conversion to and from pandas shares the arrays where pandas
+allows it (numeric columns and categorical codes) instead of copying them.
+"""
+import numpy as np
+import pandas as pd
+
+from models.it_tickets import ITTicket
+from models.ml_experiment import ExperimentRecord
+from models.security_incident import SEVERITY_LEVELS, SecurityIncident
+
+
+class RecordBatch:
+    """
+    Base class. Subclasses set `model` (built from one row's fields in constructor order),
+    `fields` (that order), `categorical` (fields stored as codes), `numeric` ({field: dtype})
+    and `datetimes` (fields parsed to datetime64). Other fields are object arrays.
+    """
+    model = None
+    fields = ()
+    categorical = ()
+    numeric = {}
+    datetimes = ()
+
+    def __init__(self, arrays, categories=None):
+        """`arrays` maps every field to an array of equal length; categorical fields hold codes."""
+        self._arrays = arrays
+        self._categories = categories or {}
+
+    # --- Construction ---
+    @classmethod
+    def _convert(cls, field, values):
+        """Converts one field's values to its stored form; returns (array, categories or None)."""
+        if field in cls.categorical:
+            categorical = pd.Categorical(values)
+            return categorical.codes, categorical.categories.to_numpy(dtype=object)
+        if field in cls.numeric:
+            return np.asarray(values, dtype=cls.numeric[field]), None
+        if field in cls.datetimes:
+            return pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[ns]"), None
+        return np.asarray(values, dtype=object), None
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Builds a batch from {field: list or array} (e.g. DatabaseManager.fetch_columns output)."""
+        arrays, categories = {}, {}
+        for field in cls.fields:
+            arrays[field], names = cls._convert(field, columns[field])
+            if names is not None:
+                categories[field] = names
+        return cls(arrays, categories)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Builds a batch from a DataFrame with a column per field. Categorical and numeric
+        columns of the right dtype are shared with the frame, not copied; anything else is
+        converted as in from_columns.
+        """
+        arrays, categories = {}, {}
+        for field in cls.fields:
+            series = frame[field]
+            if field in cls.categorical and isinstance(series.dtype, pd.CategoricalDtype):
+                arrays[field] = series.array.codes
+                categories[field] = series.cat.categories.to_numpy(dtype=object)
+            elif field in cls.numeric and series.dtype == cls.numeric[field]:
+                arrays[field] = series.to_numpy()
+            else:
+                arrays[field], names = cls._convert(field, series.to_numpy())
+                if names is not None:
+                    categories[field] = names
+        return cls(arrays, categories)
+
+    @classmethod
+    def from_objects(cls, objects):
+        """Builds a batch from model instances (via `_row`)."""
+        rows = [cls._row(obj) for obj in objects]
+        return cls.from_columns({field: [row[i] for row in rows] for i, field in enumerate(cls.fields)})
+
+    @staticmethod
+    def _row(obj):
+        """Returns a model instance's field values in `fields` order."""
+        return tuple(obj)
+
+    # --- Delta Updates ---
+    def apply_changes(self, changes):
+        """
+        Returns a new batch with a `DatabaseManager.fetch_changes` result applied (its rows
+        must include every field). Only the changed rows are converted: updates overwrite
+        their positions, deleted ids are dropped and new rows are appended, so the cost is
+        a few array copies instead of a rebuild. The batch must be in id order.
+        """
+        if changes.get("resync"):
+            raise ValueError("The change set needs a full reload.")
+        rows = changes["rows"]
+        arrays, categories = dict(self._arrays), dict(self._categories)
+        ids = arrays["id"]
+        if len(rows):
+            positions = _positions(ids, rows["id"].to_numpy(dtype=np.int64))
+            known = positions >= 0
+            for field in self.fields:
+                values = self._encode(field, rows[field].to_numpy(), categories)
+                array = arrays[field]
+                if values.dtype != array.dtype:
+                    array = array.astype(np.result_type(array, values))
+                elif known.any():
+                    # The arrays may be shared with a DataFrame, so patch a copy
+                    array = array.copy()
+                array[positions[known]] = values[known]
+                arrays[field] = array if known.all() else np.concatenate([array, values[~known]])
+        if changes["deleted"]:
+            keep = np.ones(len(arrays["id"]), dtype=bool)
+            gone = _positions(arrays["id"], np.asarray(changes["deleted"], dtype=np.int64))
+            keep[gone[gone >= 0]] = False
+            arrays = {field: values[keep] for field, values in arrays.items()}
+        return type(self)(arrays, categories)
+
+    @classmethod
+    def _encode(cls, field, values, categories):
+        """Converts new values of a field to its stored form, adding unseen names to `categories`."""
+        if field not in cls.categorical:
+            return cls._convert(field, values)[0]
+        names = pd.Index(categories[field])
+        codes = names.get_indexer(values)
+        unseen = (codes < 0) & pd.notna(values)
+        if unseen.any():
+            categories[field] = np.concatenate([categories[field], pd.unique(values[unseen]).astype(object)])
+            names = pd.Index(categories[field])
+            codes = names.get_indexer(values)
+        # Keep the smallest code type that fits, as pandas does
+        return codes.astype(np.min_scalar_type(-len(names)) if len(names) < 2 ** 15 else np.int32)
+
+    # --- Conversion ---
+    def to_frame(self):
+        """Returns a DataFrame over the batch's arrays; categorical fields become pandas categoricals."""
+        columns = {}
+        for field in self.fields:
+            if field in self._categories:
+                columns[field] = pd.Categorical.from_codes(self._arrays[field], self._categories[field], validate=False)
+            else:
+                columns[field] = self._arrays[field]
+        return pd.DataFrame(columns, copy=False)
+
+    def column(self, field):
+        """Returns a field's values as an array (categorical fields decoded)."""
+        values = self._arrays[field]
+        if field in self._categories:
+            # Code -1 (missing value) picks the trailing None
+            return np.append(self._categories[field], None)[values]
+        return values
+
+    def codes(self, field):
+        """Returns a categorical field's codes and categories (code -1 means missing)."""
+        return self._arrays[field], self._categories[field]
+
+    # --- Sequence Protocol ---
+    def __len__(self):
+        return len(self._arrays[self.fields[0]])
+
+    def __getitem__(self, index):
+        """Returns the record at `index` as a model instance."""
+        return self.model(*(self.column(field)[index] for field in self.fields))
+
+    def __iter__(self):
+        decoded = [self.column(field) for field in self.fields]
+        for values in zip(*decoded):
+            yield self.model(*values)
+
+    # --- Selection ---
+    def take(self, indices):
+        """Returns a new batch with the records at `indices` (array of positions or boolean mask)."""
+        return type(self)({field: values[indices] for field, values in self._arrays.items()}, self._categories)
+
+    def mask(self, field, values):
+        """Boolean mask of records whose `field` is one of `values` (a scalar or a list)."""
+        if np.isscalar(values) or values is None:
+            values = [values]
+        if field in self._categories:
+            wanted = pd.Index(self._categories[field]).get_indexer(list(values))
+            return np.isin(self._arrays[field], wanted[wanted >= 0])
+        return np.isin(self._arrays[field], list(values))
+
+    def where(self, **conditions):
+        """Returns the records matching every {field: value or list of values} condition."""
+        keep = np.ones(len(self), dtype=bool)
+        for field, values in conditions.items():
+            keep &= self.mask(field, values)
+        return self.take(keep)
+
+    def sort_by(self, key, descending=False):
+        """
+        Returns the batch sorted by a field name or by an array of sort keys (e.g.
+        severity_levels()). The sort is stable in both directions; categorical fields sort
+        alphabetically.
+        """
+        keys = self._arrays[key] if isinstance(key, str) else np.asarray(key)
+        if descending:
+            # Sorting the reversed keys and reversing back keeps ties in their original order
+            order = len(keys) - 1 - np.argsort(keys[::-1], kind="stable")[::-1]
+        else:
+            order = np.argsort(keys, kind="stable")
+        return self.take(order)
+
+    def lookup(self, field, table, default=0, dtype=np.int8):
+        """
+        Maps a categorical field through a {lower-case name: value} table for every record.
+        The table is consulted once per category (case-insensitively) and the codes index
+        the result, so the cost per record is one array take. Unknown or missing values get
+        `default`.
+        """
+        codes, categories = self._arrays[field], self._categories[field]
+        values = np.array(
+            [table.get(str(name).lower(), default) for name in categories] + [default], dtype=dtype
+        )
+        # Code -1 (missing) indexes the trailing default
+        return values[codes]
+
+
+def _positions(sorted_ids, wanted):
+    """Positions of `wanted` ids in an ascending id array (-1 where absent), by binary search."""
+    positions = np.searchsorted(sorted_ids, wanted)
+    found = positions < len(sorted_ids)
+    found[found] = sorted_ids[positions[found]] == wanted[found]
+    return np.where(found, positions, -1)
+
+
+class IncidentBatch(RecordBatch):
+    """Columnar SecurityIncident collection."""
+    model = SecurityIncident
+    fields = ("id", "incident_type", "severity", "status", "description", "timestamp")
+    categorical = ("incident_type", "severity", "status")
+    numeric = {"id": np.int64}
+    datetimes = ("timestamp",)
+
+    @staticmethod
+    def _row(incident):
+        return (
+            incident.get_id(), incident.get_incident_type(), incident.get_severity(),
+            incident.get_status(), incident.get_description(), incident.get_timestamp(),
+        )
+
+    def severity_levels(self):
+        """Severity levels (SEVERITY_LEVELS, case-insensitive) for every incident at once."""
+        return self.lookup("severity", SEVERITY_LEVELS)
+
+
+class TicketBatch(RecordBatch):
+    """Columnar ITTicket collection (priority is the it_tickets severity)."""
+    model = ITTicket
+    fields = ("id", "title", "priority", "status", "assigned_to", "timestamp")
+    categorical = ("priority", "status", "assigned_to")
+    numeric = {"id": np.int64}
+    datetimes = ("timestamp",)
+
+    @staticmethod
+    def _row(ticket):
+        return (
+            ticket.get_id(), ticket.get_title(), ticket.get_priority(),
+            ticket.get_status(), ticket.get_assigned_to(), ticket.get_timestamp(),
+        )
+
+    def priority_levels(self):
+        """Priority levels (same scale as incident severities) for every ticket at once."""
+        return self.lookup("priority", SEVERITY_LEVELS)
+
+
+class ExperimentBatch(RecordBatch):
+    """Columnar ExperimentRecord collection."""
+    model = ExperimentRecord
+    fields = ExperimentRecord._fields
+    categorical = ("model_name", "dataset", "status")
+    numeric = {"id": np.int64, "accuracy": np.float64, "run_time_seconds": np.float64}
+    datetimes = ("timestamp",)
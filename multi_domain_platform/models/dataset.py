@@ -17,6 +17,9 @@ class Dataset:
     # Default status when a new dataset is created
     DEFAULT_STATUS = "Pending" 
 
+    # Fixed attribute set: instances carry no __dict__
+    __slots__ = ("_id", "_name", "_size_bytes", "_rows", "_source", "_status", "_reported_by")
+
     def __init__(
         self,
         name: str,
@@ -1,11 +1,23 @@
 class ITTicket:
  """Represents an IT support ticket."""
- def __init__(self, ticket_id: int, title: str, priority: str, status, assigned_to: str):
+ __slots__ = ("__id", "__title", "__priority", "__status", "__assigned_to", "__timestamp")
+ def __init__(self, ticket_id: int, title: str, priority: str, status, assigned_to: str = None, timestamp: str = None):
     self.__id = ticket_id
     self.__title = title
     self.__priority = priority
     self.__status = status
     self.__assigned_to = assigned_to
+    self.__timestamp = timestamp
+ def get_id(self) -> int:
+    return self.__id
+ def get_title(self) -> str:
+    return self.__title
+ def get_priority(self) -> str:
+    return self.__priority
+ def get_assigned_to(self) -> str:
+    return self.__assigned_to
+ def get_timestamp(self) -> str:
+    return self.__timestamp
  def assign_to(self, staff: str) -> None:
     self.__assigned_to = staff
  def close_ticket(self) -> None:
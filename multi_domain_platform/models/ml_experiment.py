@@ -0,0 +1,6 @@
+from collections import namedtuple
+
+# One row of ml_experiments. A plain namedtuple: experiments are only read, never modified in place.
+ExperimentRecord = namedtuple(
+    "ExperimentRecord", ["id", "model_name", "dataset", "status", "accuracy", "run_time_seconds", "timestamp"]
+)
@@ -1,11 +1,24 @@
+# Severity name (lower-case) -> level; unknown severities score 0
+SEVERITY_LEVELS = {
+    "low": 1,
+    "medium": 2,
+    "high": 3,
+    "critical": 4,
+}
+
+
 class SecurityIncident:
     """Represents a cybersecurity incident in the platform."""
-    def __init__(self, incident_id: int, incident_type: str, severity: str, status: str, description: str):
+    # No per-instance __dict__: a million loaded incidents cost a fraction of the memory of dict rows
+    __slots__ = ("__id", "__incident_type", "__severity", "__status", "__description", "__timestamp")
+
+    def __init__(self, incident_id: int, incident_type: str, severity: str, status: str, description: str, timestamp: str = None):
         self.__id = incident_id
         self.__incident_type = incident_type
         self.__severity = severity
         self.__status = status
         self.__description = description
+        self.__timestamp = timestamp
 
     def get_id(self) -> int:
         return self.__id
@@ -16,15 +29,18 @@ class SecurityIncident:
     def get_description(self) -> str:
         return self.__description
 
+    def get_incident_type(self) -> str:
+        return self.__incident_type
+
+    def get_severity(self) -> str:
+        return self.__severity
+
+    def get_timestamp(self) -> str:
+        return self.__timestamp
+
     def get_severity_level(self) -> int:
-        """Return an integer severity level (simple example)."""
-        mapping = {
-            "low": 1,
-            "medium": 2,
-            "high": 3,
-            "critical": 4,
-        }
-        return mapping.get(self.__severity.lower(), 0)
+        """Return an integer severity level (see SEVERITY_LEVELS)."""
+        return SEVERITY_LEVELS.get(self.__severity.lower(), 0)
 
     def __str__(self) -> str:
         return f"Incident {self.__id} [{self.__severity.upper()}] {self.__incident_type}"
@@ -7,6 +7,8 @@ from faker import Faker
 
 # Import the DatabaseManager
 from services.database_manager import DatabaseManager 
+from services.delta_sync import refresh_session_frame
+from services.pagination import display_paginated_table
 # Removed: from services.ticket_manager import TicketManager
 
 # --- CONSTANTS AND INITIALIZATION ---
@@ -15,6 +17,8 @@ FAKE = Faker()
 TICKET_STATUSES = ['Open', 'In Progress', 'Closed']
 TICKET_SEVERITIES = ['Low', 'Medium', 'High', 'Critical']
 TICKET_TABLE_NAME = "it_tickets"
+# Columns kept in the session DataFrame (also requested from fetch_changes)
+TICKET_COLUMNS = ["id", "title", "severity", "status", "timestamp"]
 
 # --- Authentication Checks ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
@@ -40,50 +44,45 @@ def initialize_data(db_manager, num_records=1000):
     """Generates and loads test data directly into the database."""
     st.write(f"Generating and loading {num_records} IT ticket records...")
     
-    records = []
-    for i in range(1, num_records + 1):
-        records.append({
-            'title': FAKE.catch_phrase(),
-            'severity': random.choice(TICKET_SEVERITIES),
-            'status': random.choice(TICKET_STATUSES),
-            'timestamp': FAKE.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        })
-
-    insert_query = f"""
-        INSERT INTO {TICKET_TABLE_NAME} 
-        (title, severity, status, timestamp) 
-        VALUES (?, ?, ?, ?)
-    """
-    
-    insert_count = 0
-    for record in records:
-        params = (
-            record['title'], 
-            record['severity'], 
-            record['status'], 
-            record['timestamp']
+    records = (
+        (
+            FAKE.catch_phrase(),
+            random.choice(TICKET_SEVERITIES),
+            random.choice(TICKET_STATUSES),
+            FAKE.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
         )
-        rowcount, _ = db_manager.execute_query(insert_query, params)
-        if rowcount > 0:
-            insert_count += 1
+        for _ in range(num_records)
+    )
+
+    # Load every record in a single transaction instead of one commit per row
+    progress_bar = st.progress(0.0)
+    insert_count = db_manager.bulk_insert(
+        TICKET_TABLE_NAME,
+        ["title", "severity", "status", "timestamp"],
+        records,
+        batch_size=5000,
+        progress_callback=lambda done: progress_bar.progress(done / num_records)
+    )
             
     st.success(f"Successfully loaded {insert_count} records into the database!")
     return insert_count
 
 # --- DATA READING AND CACHING (Updated to use db.fetch_all) ---
 
-@st.cache_data(ttl=60)
 def get_tickets_data_from_db():
     """Fetches all tickets directly from the database."""
-    query = f"SELECT id, title, severity, status, timestamp FROM {TICKET_TABLE_NAME} ORDER BY timestamp DESC"
-    ticket_data = db.fetch_all(query)
-    df = pd.DataFrame(ticket_data)
+    query = f"SELECT {', '.join(TICKET_COLUMNS)} FROM {TICKET_TABLE_NAME}"
+    df = db.fetch_frame(query, cached=True)
 
     if not df.empty:
         st.sidebar.success(f"Loaded {len(df)} tickets from database.")
     
     return df
 
+def refresh_tickets_df():
+    """Brings the session copy of the tickets table up to date."""
+    refresh_session_frame(db, TICKET_TABLE_NAME, 'tickets_df', TICKET_COLUMNS, get_tickets_data_from_db)
+
 # --- HELPER FUNCTIONS FOR CRUD OPERATIONS (Updated to use db.execute_query) ---
 
 def get_ticket_row(df, ticket_id):
@@ -101,8 +100,7 @@ def handle_add_ticket(new_data):
     """
     rowcount, new_id = db.execute_query(query, (new_data['title'], new_data['severity']))
     
-    st.cache_data.clear()
-    st.session_state['tickets_df'] = get_tickets_data_from_db()
+    refresh_tickets_df()
     if rowcount > 0:
         st.success(f"Ticket '{new_data['title']}' added successfully. ID: {new_id}")
     else:
@@ -120,8 +118,7 @@ def handle_update_ticket(ticket_id, updated_data):
         (updated_data['title'], updated_data['severity'], updated_data['status'], ticket_id)
     )
     
-    st.cache_data.clear()
-    st.session_state['tickets_df'] = get_tickets_data_from_db()
+    refresh_tickets_df()
     if rowcount > 0:
         st.success(f"Ticket ID {ticket_id} updated successfully.")
     else:
@@ -132,8 +129,7 @@ def handle_delete_ticket(ticket_id):
     query = f"DELETE FROM {TICKET_TABLE_NAME} WHERE id = ?"
     rowcount, _ = db.execute_query(query, (ticket_id,))
     
-    st.cache_data.clear()
-    st.session_state['tickets_df'] = get_tickets_data_from_db()
+    refresh_tickets_df()
     if rowcount > 0:
         st.success(f"Ticket ID {ticket_id} deleted successfully.")
     else:
@@ -142,8 +138,8 @@ def handle_delete_ticket(ticket_id):
 
 # --- INITIALIZATION (Load the DataFrame) ---
 
-if 'tickets_df' not in st.session_state:
-    st.session_state['tickets_df'] = get_tickets_data_from_db()
+# Load the DataFrame on first visit, and reload it only when the table's data version changes
+refresh_tickets_df()
 
 df = st.session_state['tickets_df']
 
@@ -152,25 +148,28 @@ if df.empty:
     st.info("No tickets found in the database. Click the button in the sidebar to load test data.")
     if st.sidebar.button("Load 1000 Initial Tickets"):
         initialize_data(db, 1000)
-        st.cache_data.clear()
-        st.session_state['tickets_df'] = get_tickets_data_from_db()
+        refresh_tickets_df()
         st.rerun()
 
 # --- STREAMLIT PAGE FUNCTIONS ---
 
-def display_dashboard(df):
+def display_dashboard():
     """Renders the main dashboard metrics and charts."""
     st.title("Tickets Dashboard Overview")
 
-    if df.empty:
+    # Tile and chart counts come from the trigger-maintained summary table (a few dozen rows)
+    severity_counts = db.summary_counts(TICKET_TABLE_NAME, group_by=["severity"])
+    status_counts = db.summary_counts(TICKET_TABLE_NAME, group_by=["status"])
+
+    total_tickets = int(severity_counts['count'].sum())
+    if total_tickets == 0:
         return
         
     # --- Metrics Section ---
     col1, col2, col3 = st.columns(3)
     
-    total_tickets = len(df)
-    open_tickets = df[df['status'] == 'Open'].shape[0] if 'status' in df.columns else 0
-    critical_tickets = df[df['severity'] == 'Critical'].shape[0] if 'severity' in df.columns else 0
+    open_tickets = int(status_counts.loc[status_counts['status'] == 'Open', 'count'].sum())
+    critical_tickets = int(severity_counts.loc[severity_counts['severity'] == 'Critical', 'count'].sum())
 
     col1.metric("Total Tickets", total_tickets)
     col2.metric("Open Tickets", open_tickets)
@@ -182,9 +181,8 @@ def display_dashboard(df):
     st.header("Ticket Analysis")
     chart_col1, chart_col2 = st.columns(2)
 
-    if 'severity' in df.columns:
-        severity_counts = df['severity'].value_counts().reset_index()
-        severity_counts.columns = ['Severity', 'Count']
+    if not severity_counts.empty:
+        severity_counts = severity_counts.rename(columns={'severity': 'Severity', 'count': 'Count'})
         fig_severity = px.pie(
             severity_counts, 
             values='Count', 
@@ -194,9 +192,10 @@ def display_dashboard(df):
         )
         chart_col1.plotly_chart(fig_severity, use_container_width=True)
 
-    if 'status' in df.columns:
-        status_counts = df['status'].value_counts().reset_index()
-        status_counts.columns = ['Status', 'Count']
+    if not status_counts.empty:
+        status_counts = status_counts.sort_values('count', ascending=False).rename(
+            columns={'status': 'Status', 'count': 'Count'}
+        )
         fig_status = px.bar(
             status_counts, 
             x='Status', 
@@ -211,9 +210,12 @@ def display_dashboard(df):
 
     # --- Data Table Section ---
     st.header("All Tickets Data")
-    if 'timestamp' in df.columns:
-        df = df.sort_values(by='timestamp', ascending=False)
-    st.dataframe(df, use_container_width=True, height=350)
+    # Only the visible page is read from the database, newest first
+    display_paginated_table(
+        db, TICKET_TABLE_NAME,
+        ["id", "title", "severity", "status", "timestamp"],
+        state_key="ticket_page_cursors"
+    )
 
 
 def display_crud_form(df):
@@ -325,7 +327,8 @@ def display_crud_form(df):
     
     if 'timestamp' in df.columns:
         df = df.sort_values(by='timestamp', ascending=False)
-    st.dataframe(df, use_container_width=True)
+    # The session frame is indexed by id, which is also a column
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
 
 # --- MAIN APPLICATION LOGIC ---
@@ -337,6 +340,6 @@ page = st.sidebar.radio("Navigate Views", ["Dashboard Overview", "Ticket Managem
 
 # Display the main content based on the sidebar selection
 if page == "Dashboard Overview":
-    display_dashboard(df)
+    display_dashboard()
 elif page == "Ticket Management (CRUD)":
     display_crud_form(df)
\ No newline at end of file
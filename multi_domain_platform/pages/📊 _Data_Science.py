@@ -4,6 +4,8 @@ import random
 import plotly.express as px
 from faker import Faker 
 from services.database_manager import DatabaseManager 
+from services.delta_sync import refresh_session_frame
+from services.pagination import display_paginated_table
 
 # --- CONSTANTS AND INITIALIZATION ---
 db = DatabaseManager("intelligence_platform.db")
@@ -13,6 +15,8 @@ MODEL_NAMES = ["BERT-Base", "ResNet-50", "XGBoost", "Logistic Regression", "Cust
 DATASETS = ["ImageNet", "Kaggle-Housing", "Financial-TS", "E-Commerce-Reviews"]
 STATUSES = ["Completed", "Running", "Failed", "Pending"]
 ML_TABLE_NAME = "ml_experiments" 
+# Columns kept in the session DataFrame (also requested from fetch_changes)
+EXPERIMENT_COLUMNS = ["id", "timestamp", "model_name", "dataset", "status", "accuracy", "run_time_seconds"]
 
 # --- Authentication Checks ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
@@ -50,63 +54,49 @@ def generate_and_load_data(db_manager, num_records=1000):
         # Proceed, assuming the table needs to be created first (this should be handled by DatabaseManager)
         pass 
 
-    # 2. Generate Data
-    records = []
-    for i in range(1, num_records + 1):
-        record = {
-            'model_name': random.choice(MODEL_NAMES),
-            'dataset': random.choice(DATASETS),
-            'status': random.choice(STATUSES),
-            'accuracy': round(random.uniform(0.65, 0.99), 4),
-            'run_time_seconds': random.randint(300, 3600),
-            'timestamp': FAKE.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        records.append(record)
-
-    # 3. Load into DB
-    insert_query = f"""
-        INSERT INTO {ML_TABLE_NAME} 
-        (model_name, dataset, status, accuracy, run_time_seconds, timestamp) 
-        VALUES (?, ?, ?, ?, ?, ?)
-    """
-    
-    insert_count = 0
-    for record in records:
-        params = (
-            record['model_name'], 
-            record['dataset'], 
-            record['status'], 
-            record['accuracy'], 
-            record['run_time_seconds'],
-            record['timestamp']
+    # 2. Generate Data (lazily, so large loads never hold every record in memory)
+    records = (
+        (
+            random.choice(MODEL_NAMES),
+            random.choice(DATASETS),
+            random.choice(STATUSES),
+            round(random.uniform(0.65, 0.99), 4),
+            random.randint(300, 3600),
+            FAKE.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
         )
-        rowcount, _ = db_manager.execute_query(insert_query, params)
-        if rowcount > 0:
-            insert_count += 1
+        for _ in range(num_records)
+    )
+
+    # 3. Load into DB in a single transaction
+    progress_bar = st.progress(0.0)
+    insert_count = db_manager.bulk_insert(
+        ML_TABLE_NAME,
+        ["model_name", "dataset", "status", "accuracy", "run_time_seconds", "timestamp"],
+        records,
+        batch_size=5000,
+        progress_callback=lambda done: progress_bar.progress(done / num_records)
+    )
             
     st.success(f"Successfully loaded {insert_count} records into the database!")
-    st.cache_data.clear()
     st.rerun() 
 
 
 # --- Data Reading and Caching ---
 
-@st.cache_data(ttl=60)
 def get_experiment_data_from_db():
     """Fetches all ML experiments directly from the database."""
-    query = f"""
-        SELECT id, timestamp, model_name, dataset, status, accuracy, run_time_seconds 
-        FROM {ML_TABLE_NAME} 
-        ORDER BY timestamp DESC
-    """
-    experiment_data = db.fetch_all(query)
-    df = pd.DataFrame(experiment_data)
+    query = f"SELECT {', '.join(EXPERIMENT_COLUMNS)} FROM {ML_TABLE_NAME}"
+    df = db.fetch_frame(query, cached=True)
 
     if not df.empty:
         st.sidebar.success(f"Loaded {len(df)} ML experiments from database.")
     
     return df
 
+def refresh_experiment_df():
+    """Brings the session copy of the experiments table up to date."""
+    refresh_session_frame(db, ML_TABLE_NAME, 'experiment_df', EXPERIMENT_COLUMNS, get_experiment_data_from_db)
+
 # --- HELPER FUNCTIONS FOR CRUD OPERATIONS ---
 
 def get_experiment_row(df, experiment_id):
@@ -131,8 +121,7 @@ def handle_add_experiment(new_data):
     )
     rowcount, new_id = db.execute_query(query, params)
     
-    st.cache_data.clear()
-    st.session_state['experiment_df'] = get_experiment_data_from_db()
+    refresh_experiment_df()
     if rowcount > 0:
         st.success(f"Experiment '{new_data['model_name']}' added successfully. ID: {new_id}")
     else:
@@ -155,8 +144,7 @@ def handle_update_experiment(experiment_id, updated_data):
     )
     rowcount, _ = db.execute_query(query, params)
     
-    st.cache_data.clear()
-    st.session_state['experiment_df'] = get_experiment_data_from_db()
+    refresh_experiment_df()
     if rowcount > 0:
         st.success(f"Experiment ID {experiment_id} updated successfully.")
     else:
@@ -167,8 +155,7 @@ def handle_delete_experiment(experiment_id):
     query = f"DELETE FROM {ML_TABLE_NAME} WHERE id = ?"
     rowcount, _ = db.execute_query(query, (experiment_id,))
     
-    st.cache_data.clear()
-    st.session_state['experiment_df'] = get_experiment_data_from_db()
+    refresh_experiment_df()
     if rowcount > 0:
         st.success(f"Experiment ID {experiment_id} deleted successfully.")
     else:
@@ -176,8 +163,8 @@ def handle_delete_experiment(experiment_id):
 
 # --- INITIALIZATION (Load the DataFrame) ---
 
-if 'experiment_df' not in st.session_state:
-    st.session_state['experiment_df'] = get_experiment_data_from_db()
+# Load the DataFrame on first visit, and reload it only when the table's data version changes
+refresh_experiment_df()
 
 df = st.session_state['experiment_df']
 
@@ -186,18 +173,23 @@ df = st.session_state['experiment_df']
 def display_dashboard(df):
     """Renders the main dashboard metrics and charts."""
     st.title("Machine Learning Dashboard Overview")
-    
-    if df.empty:
+
+    # Counts and the accuracy average come from the trigger-maintained summary table
+    status_summary = db.summary_counts(ML_TABLE_NAME, group_by=["status"])
+
+    total_experiments = int(status_summary['count'].sum())
+    if total_experiments == 0:
         st.info("No experiments to display.")
         return
         
     # --- Metrics Section ---
     col1, col2, col3 = st.columns(3)
     
-    total_experiments = len(df)
-    completed_experiments = df[df['status'] == 'Completed'].shape[0] if 'status' in df.columns else 0
-    # Calculate average accuracy of completed models
-    avg_accuracy = df[df['status'] == 'Completed']['accuracy'].mean() if 'accuracy' in df.columns else 0
+    completed = status_summary[status_summary['status'] == 'Completed']
+    completed_experiments = int(completed['count'].sum())
+    # Average accuracy of completed models
+    avg_accuracy = completed['avg_accuracy'].iloc[0] if not completed.empty else None
+    avg_accuracy = avg_accuracy if pd.notna(avg_accuracy) else 0
 
     col1.metric("Total Experiments", total_experiments)
     col2.metric("Completed Experiments", completed_experiments)
@@ -210,9 +202,11 @@ def display_dashboard(df):
     chart_col1, chart_col2 = st.columns(2)
 
     # 1. Bar Chart: Experiments by Dataset
-    if 'dataset' in df.columns:
-        dataset_counts = df['dataset'].value_counts().reset_index()
-        dataset_counts.columns = ['Dataset', 'Count']
+    dataset_counts = db.summary_counts(ML_TABLE_NAME, group_by=["dataset"])
+    if not dataset_counts.empty:
+        dataset_counts = dataset_counts.sort_values('count', ascending=False).rename(
+            columns={'dataset': 'Dataset', 'count': 'Count'}
+        )
         
         fig_bar = px.bar(
             dataset_counts, 
@@ -242,9 +236,12 @@ def display_dashboard(df):
 
     # --- Data Table Section (Experiment Log) ---
     st.header("All ML Experiment Data")
-    if 'timestamp' in df.columns:
-        df = df.sort_values(by='timestamp', ascending=False)
-    st.dataframe(df, use_container_width=True, height=350)
+    # Only the visible page is read from the database, newest first
+    display_paginated_table(
+        db, ML_TABLE_NAME,
+        ["id", "timestamp", "model_name", "dataset", "status", "accuracy", "run_time_seconds"],
+        state_key="experiment_page_cursors"
+    )
 
 def display_crud_form(df):
     """Renders the Add Experiment (Create), Update, and Delete forms using tabs."""
@@ -386,7 +383,8 @@ def display_crud_form(df):
     # Sort the table to show newest experiments first for better visibility of CRUD operations
     if 'timestamp' in df.columns:
         df = df.sort_values(by='timestamp', ascending=False)
-    st.dataframe(df, use_container_width=True)
+    # The session frame is indexed by id, which is also a column
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
 
 # --- MAIN APPLICATION LOGIC ---
@@ -3,7 +3,11 @@ import pandas as pd
 import random
 import plotly.express as px
 from faker import Faker 
+from models.batches import IncidentBatch
 from services.database_manager import DatabaseManager 
+from services.delta_sync import refresh_session_frame
+from services.pagination import display_paginated_table
+from services.risk_scoring import top_risk_incidents
 
 # --- CONSTANTS AND INITIALIZATION ---
 db = DatabaseManager("intelligence_platform.db")
@@ -12,6 +16,8 @@ INCIDENT_TYPES = ["Malware Infection", "Phishing Attempt", "Unauthorized Access"
 SEVERITIES = ["Critical", "High", "Medium", "Low"]
 STATUSES = ["Open", "In Progress", "Closed", "Pending Review"]
 INCIDENT_TABLE_NAME = "security_incidents"
+# Columns kept in the session DataFrame (also requested from fetch_changes)
+INCIDENT_COLUMNS = ["id", "timestamp", "incident_type", "severity", "status", "description"]
 
 # --- Authentication Checks ---
 if "logged_in" not in st.session_state or not st.session_state.logged_in:
@@ -47,57 +53,66 @@ def generate_and_load_data(db_manager, num_records=1000):
     except Exception:
         pass 
 
-    # 2. Generate Data
-    records = []
-    for i in range(1, num_records + 1):
-        record = {
-            'incident_type': random.choice(INCIDENT_TYPES),
-            'severity': random.choice(SEVERITIES),
-            'status': random.choice(STATUSES),
-            'description': FAKE.sentence(nb_words=10),
-            'timestamp': FAKE.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        records.append(record)
-
-    # 3. Load into DB
-    insert_query = f"""
-        INSERT INTO {INCIDENT_TABLE_NAME} 
-        (incident_type, severity, status, description, timestamp) 
-        VALUES (?, ?, ?, ?, ?)
-    """
-    
-    insert_count = 0
-    for record in records:
-        params = (
-            record['incident_type'], 
-            record['severity'], 
-            record['status'], 
-            record['description'], 
-            record['timestamp']
+    # 2. Generate Data (lazily, so large loads never hold every record in memory)
+    records = (
+        (
+            random.choice(INCIDENT_TYPES),
+            random.choice(SEVERITIES),
+            random.choice(STATUSES),
+            FAKE.sentence(nb_words=10),
+            FAKE.date_time_this_year().strftime("%Y-%m-%d %H:%M:%S")
         )
-        rowcount, _ = db_manager.execute_query(insert_query, params)
-        if rowcount > 0:
-            insert_count += 1
+        for _ in range(num_records)
+    )
+
+    # 3. Load into DB in a single transaction
+    progress_bar = st.progress(0.0)
+    insert_count = db_manager.bulk_insert(
+        INCIDENT_TABLE_NAME,
+        ["incident_type", "severity", "status", "description", "timestamp"],
+        records,
+        batch_size=5000,
+        progress_callback=lambda done: progress_bar.progress(done / num_records)
+    )
             
     st.success(f"Successfully loaded {insert_count} records into the database!")
-    st.cache_data.clear()
     st.rerun() 
 
 
 # --- Data Reading and Caching ---
 
-@st.cache_data(ttl=60)
 def get_incident_data_from_db():
     """Fetches all incidents directly from the database."""
-    query = f"SELECT id, timestamp, incident_type, severity, status, description FROM {INCIDENT_TABLE_NAME} ORDER BY timestamp DESC"
-    incident_data = db.fetch_all(query)
-    df = pd.DataFrame(incident_data)
+    query = f"SELECT {', '.join(INCIDENT_COLUMNS)} FROM {INCIDENT_TABLE_NAME}"
+    df = db.fetch_frame(query, cached=True)
 
     if not df.empty:
         st.sidebar.success(f"Loaded {len(df)} incidents from database.")
     
     return df
 
+def refresh_incident_df():
+    """Brings the session copy of the incidents table up to date."""
+    refresh_session_frame(db, INCIDENT_TABLE_NAME, 'incident_df', INCIDENT_COLUMNS, get_incident_data_from_db)
+
+def get_incident_batch():
+    """Returns the session incidents as an IncidentBatch, patched with the changed rows when the data version moves."""
+    version = st.session_state['incident_df_version']
+    batch_version = st.session_state.get('incident_batch_version')
+    if batch_version == version:
+        return st.session_state['incident_batch']
+    changes = None
+    if batch_version is not None:
+        changes = db.fetch_changes(INCIDENT_TABLE_NAME, batch_version, columns=INCIDENT_COLUMNS)
+    if changes is None or changes["resync"]:
+        st.session_state['incident_batch'] = IncidentBatch.from_frame(st.session_state['incident_df'])
+    else:
+        # May run ahead of the DataFrame's version; the next rerun then finds nothing new to apply
+        st.session_state['incident_batch'] = st.session_state['incident_batch'].apply_changes(changes)
+        version = changes["version"]
+    st.session_state['incident_batch_version'] = version
+    return st.session_state['incident_batch']
+
 # --- HELPER FUNCTIONS FOR CRUD OPERATIONS ---
 
 def get_incident_row(df, incident_id):
@@ -115,8 +130,7 @@ def handle_add_incident(new_data):
     """
     rowcount, new_id = db.execute_query(query, (new_data['incident_type'], new_data['severity'], new_data['description']))
     
-    st.cache_data.clear()
-    st.session_state['incident_df'] = get_incident_data_from_db()
+    refresh_incident_df()
     if rowcount > 0:
         st.success(f"Incident '{new_data['incident_type']}' added successfully. ID: {new_id}")
     else:
@@ -134,8 +148,7 @@ def handle_update_incident(incident_id, updated_data):
         (updated_data['incident_type'], updated_data['severity'], updated_data['status'], updated_data['description'], incident_id)
     )
     
-    st.cache_data.clear()
-    st.session_state['incident_df'] = get_incident_data_from_db()
+    refresh_incident_df()
     if rowcount > 0:
         st.success(f"Incident ID {incident_id} updated successfully.")
     else:
@@ -146,8 +159,7 @@ def handle_delete_incident(incident_id):
     query = f"DELETE FROM {INCIDENT_TABLE_NAME} WHERE id = ?"
     rowcount, _ = db.execute_query(query, (incident_id,))
     
-    st.cache_data.clear()
-    st.session_state['incident_df'] = get_incident_data_from_db()
+    refresh_incident_df()
     if rowcount > 0:
         st.success(f"Incident ID {incident_id} deleted successfully.")
     else:
@@ -155,9 +167,8 @@ def handle_delete_incident(incident_id):
 
 # --- INITIALIZATION (Load the DataFrame) ---
 
-# Load the DataFrame from the DB only once, or refresh it on demand
-if 'incident_df' not in st.session_state:
-    st.session_state['incident_df'] = get_incident_data_from_db()
+# Load the DataFrame on first visit, and reload it only when the table's data version changes
+refresh_incident_df()
 
 df = st.session_state['incident_df']
 
@@ -167,20 +178,24 @@ if df.empty:
     
 # --- STREAMLIT PAGE FUNCTIONS ---
 
-def display_dashboard(df):
+def display_dashboard():
     """Renders the main dashboard metrics and charts and Incident Log."""
     st.title("Incidents Dashboard Overview")
 
-    if df.empty:
+    # Tile and chart counts come from the trigger-maintained summary table (a few dozen rows)
+    severity_counts = db.summary_counts(INCIDENT_TABLE_NAME, group_by=["severity"])
+    status_counts = db.summary_counts(INCIDENT_TABLE_NAME, group_by=["status"])
+
+    total_incidents = int(severity_counts['count'].sum())
+    if total_incidents == 0:
         st.info("No incidents to display.")
         return
         
     # --- Metrics Section ---
     col1, col2, col3 = st.columns(3)
     
-    total_incidents = len(df)
-    open_incidents = df[df['status'] == 'Open'].shape[0] if 'status' in df.columns else 0
-    critical_incidents = df[df['severity'] == 'Critical'].shape[0] if 'severity' in df.columns else 0
+    open_incidents = int(status_counts.loc[status_counts['status'] == 'Open', 'count'].sum())
+    critical_incidents = int(severity_counts.loc[severity_counts['severity'] == 'Critical', 'count'].sum())
 
     col1.metric("Total Incidents", total_incidents)
     col2.metric("Open Incidents", open_incidents)
@@ -193,12 +208,12 @@ def display_dashboard(df):
     chart_col1, chart_col2 = st.columns(2)
 
     # 1. Bar Chart: Incidents by Severity
-    if 'severity' in df.columns:
-        severity_counts = df['severity'].value_counts().reindex(SEVERITIES, fill_value=0).reset_index()
+    if not severity_counts.empty:
+        severity_counts = severity_counts.set_index('severity')['count'].reindex(SEVERITIES, fill_value=0).reset_index()
         severity_counts.columns = ['Severity', 'Count']
         
         color_map = {
-            "Critical": "red", "Migh": "orange", 
+            "Critical": "red", "High": "orange", 
             "Medium": "gold", "Low": "green"
         }
         
@@ -214,9 +229,9 @@ def display_dashboard(df):
         chart_col1.plotly_chart(fig_bar, use_container_width=True)
 
     # 2. Pie Chart: Distribution of Incident Types
-    if 'incident_type' in df.columns:
-        type_counts = df['incident_type'].value_counts().reset_index()
-        type_counts.columns = ['Incident_Type', 'Count']
+    type_counts = db.aggregate(INCIDENT_TABLE_NAME, group_by=["incident_type"])
+    if not type_counts.empty:
+        type_counts = type_counts.rename(columns={'incident_type': 'Incident_Type', 'count': 'Count'})
         
         fig_pie = px.pie(
             type_counts, 
@@ -228,11 +243,29 @@ def display_dashboard(df):
 
     st.markdown("---")
 
+    # --- Highest-Risk Section ---
+    st.header("🔥 Highest-Risk Open Incidents")
+    top_count = st.slider("Show top", min_value=5, max_value=50, value=10, step=5, key="top_risk_count")
+    # Severity, type, age and status scored over every incident at once; argpartition picks the top N
+    top_risk = top_risk_incidents(get_incident_batch(), n=top_count)
+    if top_risk.empty:
+        st.info("No open incidents.")
+    else:
+        st.dataframe(
+            top_risk[["risk_score", "id", "timestamp", "incident_type", "severity", "status", "description"]],
+            use_container_width=True, hide_index=True,
+        )
+
+    st.markdown("---")
+
     # --- Data Table Section (Incident Log) ---
     st.header("All Incidents Data")
-    if 'timestamp' in df.columns:
-        df = df.sort_values(by='timestamp', ascending=False)
-    st.dataframe(df, use_container_width=True, height=350)
+    # Only the visible page is read from the database, newest first
+    display_paginated_table(
+        db, INCIDENT_TABLE_NAME,
+        ["id", "timestamp", "incident_type", "severity", "status", "description"],
+        state_key="incident_page_cursors"
+    )
 
 def display_crud_form(df):
     """Renders the Add Incident (Create), Update, and Delete forms using tabs."""
@@ -358,7 +391,8 @@ def display_crud_form(df):
     # Sort the table to show newest incidents first for better visibility of CRUD operations
     if 'timestamp' in df.columns:
         df = df.sort_values(by='timestamp', ascending=False)
-    st.dataframe(df, use_container_width=True)
+    # The session frame is indexed by id, which is also a column
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
 
 # --- MAIN APPLICATION LOGIC ---
@@ -370,6 +404,6 @@ page = st.sidebar.radio("Navigate Views", ["Dashboard Overview", "Incident Manag
 
 # Display the main content based on the sidebar selection
 if page == "Dashboard Overview":
-    display_dashboard(st.session_state['incident_df'])
+    display_dashboard()
 elif page == "Incident Management (CRUD)":
     display_crud_form(st.session_state['incident_df'])
\ No newline at end of file
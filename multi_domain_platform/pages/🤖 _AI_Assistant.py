@@ -43,7 +43,6 @@ DOMAIN_CONFIGS = {
 }
 # --- HELPER FUNCTIONS ---
 
-@st.cache_data(ttl=60)
 def fetch_data_for_domain(domain_key: str) -> Optional[pd.DataFrame]:
     """Fetches the data required by the selected domain from the database."""
     config = DOMAIN_CONFIGS.get(domain_key)
@@ -51,7 +50,8 @@ def fetch_data_for_domain(domain_key: str) -> Optional[pd.DataFrame]:
         return pd.DataFrame()
 
     query = f"SELECT {config['fields']} FROM {config['table']} ORDER BY timestamp DESC LIMIT 500"
-    data = db.fetch_all(query)
+    # Shared result cache: only invalidated when this domain's table is written
+    data = db.fetch_all(query, cached=True)
     
     if data:
         return pd.DataFrame(data)
@@ -0,0 +1,143 @@
+"""
+Hot/cold archival of finished records into an ATTACHed archive database.
+
+Closed incidents and tickets and finished experiments are moved, once they have not
+changed for a configurable number of days, from the hot tables into tables of the same
+name in a separate SQLite file attached as `archive`. The hot tables (and with them every
+dashboard scan, sort and index) only hold the working set; the archive keeps the history.
+"""
+import os
+import re
+import time
+
+ARCHIVE_SCHEMA = "archive"
+
+_WITH_RE = re.compile(r"^\s*WITH\s+(RECURSIVE\s+)?", re.IGNORECASE)
+
+# Domain table -> statuses after which a row is finished and may be archived
+ARCHIVE_POLICIES = {
+    "security_incidents": ["Closed"],
+    "it_tickets": ["Closed", "Resolved"],
+    "ml_experiments": ["Completed", "Failed"],
+}
+
+
+def archive_path_for(db_name):
+    """Returns the default archive file for a database: `<name>_archive<ext>` next to it."""
+    root, ext = os.path.splitext(os.path.abspath(db_name))
+    return f"{root}_archive{ext or '.db'}"
+
+
+def attach_archive(conn, path):
+    """Attaches the archive file (created on first use) to `conn` as `archive`, in WAL mode."""
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode = WAL")
+
+
+def _columns(conn, schema, table):
+    """Returns [(name, declared type)] for `schema.table`, or [] if it does not exist."""
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def hot_columns(conn, table):
+    """Returns the column names of the hot table, in order."""
+    return [name for name, _ in _columns(conn, "main", table)]
+
+
+def ensure_archive_tables(conn):
+    """
+    Creates each archive table with the hot table's columns plus `archived_at`, and adds
+    columns that later migrations added to the hot table. Constraints, triggers and most
+    indexes are left out: archived rows are only appended and read in bulk.
+    """
+    for table in ARCHIVE_POLICIES:
+        hot = _columns(conn, "main", table)
+        existing = {name for name, _ in _columns(conn, ARCHIVE_SCHEMA, table)}
+        if not existing:
+            definitions = ", ".join(
+                "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {declared}" for name, declared in hot
+            )
+            conn.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} ({definitions}, archived_at DATETIME)")
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_{table}_archive_timestamp ON {table} (timestamp DESC, id DESC)"
+            )
+            continue
+        for name, declared in hot:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {declared}")
+    conn.commit()
+
+
+def archive_batch(conn, table, cutoff, batch_size):
+    """
+    Moves up to `batch_size` finished rows last changed before `cutoff` ('YYYY-MM-DD HH:MM:SS')
+    from the hot table into the archive in one short transaction. Returns the number moved.
+
+    With the main database in WAL mode SQLite commits each attached file atomically but not
+    both together, so a crash mid-commit can leave a row in both stores. The copy uses
+    INSERT OR REPLACE, so the next run simply moves such a row again.
+    """
+    statuses = ARCHIVE_POLICIES[table]
+    columns = ", ".join(hot_columns(conn, table))
+    selector = (
+        f"SELECT id FROM main.{table} WHERE status IN ({', '.join('?' for _ in statuses)}) "
+        f"AND COALESCE(updated_at, timestamp) < ? ORDER BY id LIMIT ?"
+    )
+    params = (*statuses, cutoff, batch_size)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({columns}, archived_at) "
+            f"SELECT {columns}, CURRENT_TIMESTAMP FROM main.{table} WHERE id IN ({selector})",
+            params,
+        )
+        moved = conn.execute(f"DELETE FROM main.{table} WHERE id IN ({selector})", params).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return moved
+
+
+def archive_table(conn, table, older_than_days, batch_size=500, pause=0.05, max_batches=None):
+    """
+    Archives every finished row of `table` unchanged for `older_than_days`, one bounded
+    batch per transaction with `pause` seconds between batches so other writers get the
+    lock. Returns the number of rows moved.
+    """
+    cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - older_than_days * 86400))
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(conn, table, cutoff, batch_size)
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def with_archived(query, tables, columns_for):
+    """
+    Rewrites `query` so each of `tables` it reads means hot rows UNION ALL archived rows.
+
+    A CTE named like the table is prepended; unqualified references (including aliased
+    ones) resolve to it, while the CTE itself reads the schema-qualified tables. SQLite
+    pushes the outer WHERE into both halves, so indexes on either side are still used.
+    """
+    definitions = []
+    for table in tables:
+        columns = ", ".join(columns_for(table))
+        definitions.append(
+            f"{table} AS (SELECT {columns} FROM main.{table} "
+            f"UNION ALL SELECT {columns} FROM {ARCHIVE_SCHEMA}.{table})"
+        )
+    if not definitions:
+        return query
+    existing = _WITH_RE.match(query)
+    if existing:
+        # Join the query's own WITH clause (keeping RECURSIVE if present)
+        return f"WITH {existing.group(1) or ''}{', '.join(definitions)}, {query[existing.end():]}"
+    return f"WITH {', '.join(definitions)} {query}"
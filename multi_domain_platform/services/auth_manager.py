@@ -1,20 +1,45 @@
-import bcrypt
 import re
+import threading
+import time
+from collections import Counter, deque
+
+from services.password_hasher import HasherBusyError, HasherTimeoutError, PasswordHasher
+from services.rate_limiter import RateLimitedError, TokenBucketLimiter
+
+# Login attempts allowed per username: a burst of 5, then one every 30 s
+USERNAME_BURST, USERNAME_REFILL_PER_SECOND = 5, 1 / 30
+# Login attempts allowed per client (address): a burst of 20, then one every 3 s
+CLIENT_BURST, CLIENT_REFILL_PER_SECOND = 20, 1 / 3
 
 class AuthManager:
-    def __init__(self, db_manager):
+    # Login outcome counters and latencies, shared by every session in the process
+    _login_counts = Counter()
+    _login_latencies = deque(maxlen=1000)
+    _login_lock = threading.Lock()
+
+    def __init__(self, db_manager, hasher=None):
         self.db = db_manager
+        # bcrypt runs on a bounded worker pool shared by every session, never on the script thread.
+        # The pool's slot limit is also the global cap on concurrent bcrypt work: excess attempts are rejected, not queued.
+        self.hasher = hasher or PasswordHasher.shared()
+        self.username_limiter = TokenBucketLimiter.shared(
+            "login_username", capacity=USERNAME_BURST, refill_rate=USERNAME_REFILL_PER_SECOND
+        )
+        self.client_limiter = TokenBucketLimiter.shared(
+            "login_client", capacity=CLIENT_BURST, refill_rate=CLIENT_REFILL_PER_SECOND
+        )
 
     def hash_password(self, password):
-        """Hashes the password using bcrypt."""
-        # bcrypt requires the password to be bytes
-        hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        return hashed.decode('utf-8')
+        """Hashes the password using bcrypt (raises HasherBusyError / HasherTimeoutError under overload)."""
+        return self.hasher.hash(password)
 
     def check_password(self, password, password_hash):
-        """Checks if the provided password matches the hash."""
-        # bcrypt requires both password and hash to be bytes
-        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        """Checks if the provided password matches the hash (raises HasherBusyError / HasherTimeoutError under overload)."""
+        return self.hasher.check(password, password_hash)
+
+    def hasher_stats(self):
+        """Returns the bcrypt pool's counters and latency percentiles."""
+        return self.hasher.stats()
 
     def validate_username(self, username):
         """Validates username format and length."""
@@ -42,17 +67,70 @@ class AuthManager:
         # db.insert_user returns False if the username already exists
         return self.db.insert_user(username, hashed_password)
 
-    def login(self, username, password):
-        """Authenticates a user."""
+    def login(self, username, password, client=None):
+        """
+        Authenticates a user.
+
+        Attempts are rate limited per client (e.g. the caller's IP address, if known) and per
+        username before any database lookup or bcrypt work; a limited attempt raises
+        RateLimitedError with `retry_after` seconds. HasherBusyError / HasherTimeoutError
+        mean the global bcrypt capacity is exhausted.
+        """
+        started = time.perf_counter()
+        if client:
+            retry_after = self.client_limiter.try_acquire(client)
+            if retry_after:
+                self._count_login("rejected_client")
+                raise RateLimitedError("Too many login attempts from this client.", retry_after)
+        retry_after = self.username_limiter.try_acquire(username.lower())
+        if retry_after:
+            self._count_login("rejected_username")
+            raise RateLimitedError("Too many login attempts for this username.", retry_after)
+
         user = self.db.get_user(username)
         
         if user is None:
             # User not found
+            self._count_login("failed", started)
             return False
             
         # Check the provided password against the stored hash
-        if self.check_password(password, user['password_hash']):
+        try:
+            matched = self.check_password(password, user['password_hash'])
+        except (HasherBusyError, HasherTimeoutError):
+            self._count_login("rejected_busy")
+            raise
+        if matched:
+            # A successful login gives the user their full allowance back
+            self.username_limiter.reset(username.lower())
+            self._count_login("succeeded", started)
             return True
         else:
             # Incorrect password
-            return False
\ No newline at end of file
+            self._count_login("failed", started)
+            return False
+
+    def _count_login(self, outcome, started=None):
+        with self._login_lock:
+            self._login_counts[outcome] += 1
+            if started is not None:
+                self._login_latencies.append(time.perf_counter() - started)
+
+    def login_stats(self):
+        """
+        Returns login outcome counters (succeeded, failed, rejected_client, rejected_username,
+        rejected_busy), p50/p95 latency of completed logins in ms, and the limiter and bcrypt
+        pool counters.
+        """
+        with self._login_lock:
+            stats = {outcome: self._login_counts[outcome] for outcome in (
+                "succeeded", "failed", "rejected_client", "rejected_username", "rejected_busy"
+            )}
+            ordered = sorted(self._login_latencies)
+        if ordered:
+            stats["p50_ms"] = round(ordered[len(ordered) // 2] * 1000, 1)
+            stats["p95_ms"] = round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1)
+        stats["username_limiter"] = self.username_limiter.stats()
+        stats["client_limiter"] = self.client_limiter.stats()
+        stats["bcrypt_pool"] = self.hasher.stats()
+        return stats
\ No newline at end of file
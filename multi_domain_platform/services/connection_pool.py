@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of SQLite connections for one database file.
+
+    Streamlit re-executes every page script on each rerun, so a fresh
+    DatabaseManager is built many times per session. The pool is therefore
+    shared per database file (see `for_database`) and outlives the managers
+    that borrow from it.
+    """
+
+    # Registry of pools keyed by absolute database path
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_name, max_size=5, timeout=10.0, health_check_interval=30.0, on_connect=None):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        # Optional callback run once on every newly opened connection (e.g. PRAGMA setup)
+        self.on_connect = on_connect
+
+        self._idle = []          # list of (connection, last_used) tuples
+        self._created = 0        # connections currently owned by the pool
+        self._cond = threading.Condition(threading.Lock())
+        self._local = threading.local()
+
+        # Simple counters, exposed through stats()
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._discarded = 0
+
+    @classmethod
+    def for_database(cls, db_name, max_size=5, **kwargs):
+        """Returns the shared pool for `db_name`, creating it on first use."""
+        key = os.path.abspath(db_name)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls(db_name, max_size=max_size, **kwargs)
+                cls._pools[key] = pool
+            return pool
+
+    # --- Connection Lifecycle ---
+    def _connect(self):
+        """Opens a new connection that may be handed between threads."""
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        if self.on_connect is not None:
+            try:
+                self.on_connect(conn)
+            except Exception:
+                conn.close()
+                raise
+        return conn
+
+    def connect_unpooled(self):
+        """Opens a connection with the pool's setup applied that the caller owns and must close."""
+        return self._connect()
+
+    def _is_healthy(self, conn, last_used):
+        """Pings connections that have been idle longer than the check interval."""
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """Closes a connection and frees its slot. Caller must hold the lock."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._created -= 1
+        self._discarded += 1
+        self._cond.notify()
+
+    def _take_idle(self):
+        """Pops an idle connection, preferring the one this thread used last."""
+        preferred = getattr(self._local, "conn", None)
+        for index, (conn, last_used) in enumerate(self._idle):
+            if conn is preferred:
+                self._hits += 1
+                return self._idle.pop(index)
+        return self._idle.pop()
+
+    def acquire(self):
+        """Borrows a connection, waiting up to `timeout` seconds if the pool is exhausted."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn, last_used = self._take_idle()
+                    if self._is_healthy(conn, last_used):
+                        self._local.conn = conn
+                        return conn
+                    self._discard(conn)
+
+                if self._created < self.max_size:
+                    self._created += 1
+                    self._misses += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout} seconds."
+                    )
+                self._waits += 1
+                self._cond.wait(remaining)
+
+        # Connect outside the lock so slow opens don't block other borrowers
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        self._local.conn = conn
+        return conn
+
+    def release(self, conn):
+        """Returns a borrowed connection to the pool."""
+        broken = False
+        try:
+            # Never hand a half-finished transaction to the next borrower
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            broken = True
+
+        with self._cond:
+            if broken:
+                self._discard(conn)
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection and always returns it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Closes every idle connection. Borrowed connections close when returned."""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+    def stats(self):
+        """Returns a snapshot of pool usage counters."""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+                "thread_reuse_hits": self._hits,
+                "new_connections": self._misses,
+                "waits": self._waits,
+                "discarded": self._discarded,
+            }
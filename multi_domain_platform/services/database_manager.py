@@ -1,118 +1,921 @@
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from itertools import islice
+from operator import itemgetter
+
+import pandas as pd
+
+from services.archive import (
+    ARCHIVE_POLICIES, archive_path_for, archive_table, attach_archive, ensure_archive_tables, hot_columns, with_archived,
+)
+from services.connection_pool import ConnectionPool
+from services.db_profiles import apply_profile, read_active_settings, resolve_profile
+from services.federation import LEGACY_DB_PATH, Federation, attach_databases, detach_databases
+from services.migrations import (
+    INDEXES, LATEST_VERSION, VERSIONED_TABLES, create_change_trigger, create_index, get_version, migrate,
+    prune_tombstones,
+)
+from services.query_cache import QueryCache, tables_read
+from services.query_stats import QueryStats
+from services.snapshot import SnapshotJob
+from services.search import (
+    RANKED_MATCH_LIMIT, SEARCH_INDEXES, add_rows_to_search, create_search_trigger, match_count_query,
+    match_expression, rebuild_search_index, search_query,
+)
+from services.summaries import SUMMARIES, add_rows_to_summary, create_summary_trigger, rebuild_summary, summary_table
+from services.write_queue import WriteQueue
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _check_identifier(name):
+    """Rejects table/column names that are not plain identifiers, since they are formatted into SQL."""
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+
+# Aggregate metrics accepted by DatabaseManager.aggregate: "count" or "<func>(<column>)"
+_METRIC_RE = re.compile(r"^\s*(count|sum|avg|min|max)\s*(?:\(\s*(\*|[A-Za-z_][A-Za-z0-9_]*)\s*\))?\s*$", re.IGNORECASE)
+
+def _metric_sql(metric):
+    """Turns a metric spec such as "count" or "avg(accuracy)" into (SQL expression, column alias)."""
+    match = _METRIC_RE.match(metric)
+    if match is None or (match.group(2) is None and match.group(1).lower() != "count"):
+        raise ValueError(f"Invalid metric: {metric!r}. Use 'count' or sum/avg/min/max/count(<column>).")
+    func, column = match.group(1).lower(), match.group(2)
+    if column is None or column == "*":
+        return "COUNT(*)", "count"
+    return f"{func.upper()}({column})", f"{func}_{column}"
+
+# Tombstones older than this are pruned after archiving; delta copies older than that reload in full
+TOMBSTONE_RETENTION_DAYS = 7
+
+# Per-thread map of connection pool -> active unit of work, so every manager for the same file joins it
+_transactions = threading.local()
+
+class _UnitOfWork:
+    """Tracks the connection and nesting depth of a thread's open transaction."""
+    def __init__(self, conn):
+        self.conn = conn
+        self.depth = 0
+        self.writes = []  # write statements whose cache invalidation waits for the commit
 
 class DatabaseManager:
-    def __init__(self, db_name):
+    # Declared secondary indexes (name -> (table, columns)); created by migration 2
+    INDEXES = INDEXES
+
+    # Hot-table columns for the archive rewrite, per connection pool: the schema is checked once per file
+    _archive_columns_by_pool = {}
+    _schema_lock = threading.Lock()
+
+    def __init__(
+        self, db_name, pool_size=5, profile="balanced", write_behind=False, archive_path=None,
+        write_max_batch=100, write_max_delay=0.0, write_timeout=30.0,
+    ):
         self.db_name = db_name
+        # Cold storage for finished records, attached to every connection as `archive`
+        self.archive_path = archive_path or archive_path_for(db_name)
+        # PRAGMA settings ("durable", "balanced", "read-heavy" or a dict of overrides) applied to every connection
+        settings = resolve_profile(profile)
+
+        def setup_connection(conn):
+            apply_profile(conn, settings)
+            attach_archive(conn, self.archive_path)
+
+        # Connections are shared per database file, so rebuilding the manager on every rerun is cheap.
+        # The first manager to open a file decides the pool size, profile and archive file for that file.
+        self._pool = ConnectionPool.for_database(db_name, max_size=pool_size, on_connect=setup_connection)
+        # Result cache shared by every manager for this file; writes invalidate only the tables they touch
+        self._cache = QueryCache.for_pool(self._pool)
+        for table in VERSIONED_TABLES:
+            # Triggers bump table_versions and log tombstones whenever these tables change
+            self._cache.add_dependency(table, "table_versions")
+            self._cache.add_dependency(table, "deleted_rows")
+        for table in SUMMARIES:
+            self._cache.add_dependency(table, summary_table(table))
+        # Cached reads of these tables are checked against the data version of the source table,
+        # so writes from other processes (or app/data) are noticed too
+        self._version_sources = {table: table for table in VERSIONED_TABLES}
+        self._version_sources.update({summary_table(table): table for table in SUMMARIES if table in VERSIONED_TABLES})
+        # Per-query latency percentiles and slow-query log, shared by every manager for this file
+        self._stats = QueryStats.for_pool(self._pool)
         # This method is called when DatabaseManager is instantiated, ensuring all tables exist.
         self._create_table() 
+        # Optional write-behind mode: writes go through one shared writer thread with group commit.
+        # Groups hold up to write_max_batch statements, waiting up to write_max_delay seconds for more;
+        # like the pool size, the first manager to start the writer for a file decides these.
+        self._writer = (
+            WriteQueue.for_pool(
+                self._pool, max_batch=write_max_batch, max_delay=write_max_delay,
+                on_commit=self._cache.invalidate_for_write,
+            ) if write_behind else None
+        )
+        # Seconds execute_query waits for a queued write before withdrawing it
+        self.write_timeout = write_timeout
 
     # --- Core Connection Helper ---
+    @contextmanager
     def _get_connection(self):
-        """Returns a new SQLite connection."""
-        return sqlite3.connect(self.db_name)
+        """Yields the active transaction's connection, or borrows a pooled one for this call."""
+        unit = self._current_transaction()
+        if unit is not None:
+            yield unit.conn
+            return
+        with self._pool.connection() as conn:
+            yield conn
+
+    # --- Transactions (Unit of Work) ---
+    def _current_transaction(self):
+        """Returns this thread's open unit of work for this database, if any."""
+        return getattr(_transactions, "units", {}).get(self._pool)
+
+    def in_transaction(self):
+        """True while the calling thread is inside `with db.transaction():`."""
+        return self._current_transaction() is not None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups several writes into a single commit.
+
+        Inside the block, execute_query, bulk_insert, insert_user and fetch_all all use
+        the same connection and nothing is committed until the block exits. Any exception
+        rolls the whole unit back and is re-raised; failing statements raise instead of
+        returning (0, None) so a partial unit can never be committed. Nested blocks use
+        SAVEPOINTs, so an inner failure only undoes the inner block if it is caught.
+        """
+        units = getattr(_transactions, "units", None)
+        if units is None:
+            units = _transactions.units = {}
+
+        unit = units.get(self._pool)
+        if unit is not None:
+            savepoint = f"uow_{unit.depth}"
+            unit.depth += 1
+            unit.conn.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield self
+                unit.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+            except BaseException:
+                unit.conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                unit.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                raise
+            finally:
+                unit.depth -= 1
+            return
+
+        with self._pool.connection() as conn:
+            # IMMEDIATE takes the write lock up front, so the unit cannot fail half-way on a lock upgrade
+            conn.execute("BEGIN IMMEDIATE")
+            unit = units[self._pool] = _UnitOfWork(conn)
+            try:
+                yield self
+                conn.commit()
+                for query in unit.writes:
+                    self._cache.invalidate_for_write(query)
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                del units[self._pool]
+
+    # --- Query Result Cache ---
+    def _read_through_cache(self, kind, query, params, load, count_rows):
+        """Serves `load()` from the shared result cache, keyed by kind, SQL and params."""
+        tables = tables_read(query)
+        # Reads inside a unit of work may see uncommitted rows, so they never touch the cache
+        if not tables or self.in_transaction():
+            return load()
+        key = (kind, query, tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params))
+        version = self._data_versions(tables)
+        hit, value = self._cache.get(key, version)
+        if hit:
+            return value
+        snapshot = self._cache.snapshot(tables)
+        value = load()
+        # The version was read before the load, so a write landing in between only costs a reload
+        self._cache.put(key, value, snapshot, count_rows(value), version)
+        return value
+
+    def _data_versions(self, tables):
+        """Returns the data versions of the tracked tables behind `tables` (None if there are none)."""
+        sources = sorted({self._version_sources[table] for table in tables if table in self._version_sources})
+        if not sources:
+            return None
+        with self._get_connection() as conn:
+            return tuple(conn.execute(
+                f"SELECT table_name, version FROM table_versions WHERE table_name IN ({', '.join('?' * len(sources))}) ORDER BY table_name",
+                sources,
+            ).fetchall())
+
+    def _record_write(self, query):
+        """Invalidates cached reads of the table `query` wrote (at commit time inside a transaction)."""
+        unit = self._current_transaction()
+        if unit is not None:
+            unit.writes.append(query)
+        else:
+            self._cache.invalidate_for_write(query)
+
+    def cache_stats(self):
+        """Returns hit/miss/eviction counters for the shared result cache."""
+        return self._cache.stats()
+
+    def clear_cache(self):
+        """Drops every cached result for this database."""
+        self._cache.clear()
+
+    # --- Data Versions ---
+    def table_version(self, name):
+        """
+        Returns the data version of a domain table: a counter that increases with every
+        row inserted, updated or deleted. Compare it with the version stored next to a cached
+        or session copy to know, with a single-row read, whether the copy is stale.
+        """
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT version FROM table_versions WHERE table_name = ?", (name,)).fetchone()
+        if row is None:
+            raise ValueError(f"Table '{name}' has no data version. Tracked tables: {', '.join(VERSIONED_TABLES)}.")
+        return row[0]
+
+    def fetch_changes(self, table, since_version, columns=None):
+        """Returns {version, resync, inserted, updated, deleted, rows} for `table` after `since_version`; `resync` means reload in full."""
+        if table not in VERSIONED_TABLES:
+            raise ValueError(f"Table '{table}' has no data version. Tracked tables: {', '.join(VERSIONED_TABLES)}.")
+        columns = list(columns) if columns else []
+        for column in columns:
+            _check_identifier(column)
+        selected = columns + [key for key in ("id", "created_version") if columns and key not in columns]
+        select_list = ", ".join(selected) if selected else "*"
+
+        in_transaction = self.in_transaction()
+        with self._get_connection() as conn:
+            # An explicit read transaction keeps the version, rows and tombstones consistent
+            if not in_transaction:
+                conn.execute("BEGIN")
+            try:
+                version, floor = conn.execute(
+                    "SELECT version, tombstone_floor FROM table_versions WHERE table_name = ?", (table,)
+                ).fetchone()
+                # Ahead of the table means the copy came from a different (older or replaced) file
+                if since_version < floor or since_version > version:
+                    return {
+                        "version": version, "resync": True, "inserted": [], "updated": [], "deleted": [],
+                        "rows": pd.DataFrame(columns=columns or None),
+                    }
+                started = time.perf_counter()
+                changes_query = f"SELECT {select_list} FROM {table} WHERE row_version > ? ORDER BY id"
+                cursor = conn.execute(changes_query, (since_version,))
+                names = [description[0] for description in cursor.description]
+                rows = pd.DataFrame.from_records(cursor.fetchall(), columns=names)
+                deleted = [
+                    row[0] for row in conn.execute(
+                        "SELECT row_id FROM deleted_rows WHERE table_name = ? AND version > ?", (table, since_version)
+                    )
+                ]
+            finally:
+                if not in_transaction:
+                    conn.rollback()
+
+        self._observe(changes_query, (since_version,), started, len(rows))
+        created = rows["created_version"] > since_version
+        inserted = rows.loc[created, "id"].tolist()
+        updated = rows.loc[~created, "id"].tolist()
+        if columns:
+            rows = rows[columns]
+        return {
+            "version": version, "resync": False, "inserted": inserted, "updated": updated, "deleted": deleted,
+            "rows": rows,
+        }
+
+    def prune_tombstones(self, before_version=None, tables=None, older_than_days=TOMBSTONE_RETENTION_DAYS):
+        """Deletes tombstones below `before_version` (default: older than `older_than_days`); returns {table: removed}."""
+        tables = list(tables or VERSIONED_TABLES)
+        for table in tables:
+            if table not in VERSIONED_TABLES:
+                raise ValueError(f"Table '{table}' has no data version. Tracked tables: {', '.join(VERSIONED_TABLES)}.")
+        cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - older_than_days * 86400))
+        removed = {}
+        for table in tables:
+            with self.transaction(), self._get_connection() as conn:
+                threshold = before_version
+                if threshold is None:
+                    newest = conn.execute(
+                        "SELECT MAX(version) FROM deleted_rows WHERE table_name = ? AND deleted_at < ?", (table, cutoff)
+                    ).fetchone()[0]
+                    threshold = 0 if newest is None else newest + 1
+                removed[table] = prune_tombstones(conn, table, threshold) if threshold else 0
+                if removed[table]:
+                    self._record_write("DELETE FROM deleted_rows")
+        return removed
+
+    # --- Query Instrumentation ---
+    def _observe(self, query, params, started, rows, explain=True):
+        """Records a finished query's latency and row count; slow ones are logged with their plan."""
+        self._stats.record(
+            query, time.perf_counter() - started, rows, params,
+            explain=(lambda: self.explain(query, params)["plan"]) if explain else None,
+        )
+
+    def query_stats(self, limit=10, sort_by="total_ms"):
+        """Returns the top query fingerprints by `sort_by` (total_ms, p95_ms, calls, ...) with p50/p95/p99 latencies."""
+        return self._stats.top(limit, sort_by)
+
+    def slow_queries(self, limit=20):
+        """Returns the most recent slow-query log entries (with EXPLAIN QUERY PLAN), newest first."""
+        return self._stats.slow_queries(limit)
+
+    def reset_query_stats(self):
+        """Clears the query timings and the slow-query log."""
+        self._stats.reset()
+
+    def pool_stats(self):
+        """Returns usage counters for the shared connection pool."""
+        return self._pool.stats()
+
+    def active_settings(self):
+        """Returns the performance PRAGMAs currently in effect on the pooled connections."""
+        with self._get_connection() as conn:
+            return read_active_settings(conn)
 
     # --- Read Operations (Used by all dashboards) ---
-    def fetch_all(self, query, params=()):
-        """Fetches all rows from a query and returns them as a list of dicts."""
-        conn = self._get_connection()
-        try:
+    def fetch_all(self, query, params=(), cached=False, include_archived=False):
+        """
+        Fetches all rows from a query and returns them as a list of dicts.
+
+        With `cached=True` the result is served from the shared result cache until a write
+        touches one of the tables the query reads. Cached results must not be modified.
+        With `include_archived=True` the domain tables it reads also include archived rows.
+        """
+        if cached:
+            return self._read_through_cache(
+                "rows+archived" if include_archived else "rows", query, params,
+                lambda: self.fetch_all(query, params, include_archived=include_archived), len,
+            )
+        if include_archived:
+            query = self._with_archived(query)
+        started = time.perf_counter()
+        with self._get_connection() as conn:
+            cursor = conn.execute(query, params)
+            columns = [col[0] for col in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        self._observe(query, params, started, len(rows))
+        return rows
+
+    def fetch_columns(self, query, params=(), batch_size=1000, include_archived=False):
+        """
+        Fetches a query result as a dict of column name -> list of values.
+
+        Rows are pulled from the cursor `batch_size` at a time and copied straight into
+        the column lists, so no per-row dict is ever built and only one batch of row
+        tuples is alive at once. `include_archived` works as in fetch_all.
+        """
+        if include_archived:
+            query = self._with_archived(query)
+        started = time.perf_counter()
+        with self._get_connection() as conn:
+            cursor = conn.execute(query, params)
+            names = [col[0] for col in cursor.description]
+            columns = [[] for _ in names]
+            getters = [itemgetter(index) for index in range(len(names))]
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for column, getter in zip(columns, getters):
+                    column.extend(map(getter, batch))
+        self._observe(query, params, started, len(columns[0]) if columns else 0)
+        return dict(zip(names, columns))
+
+    def fetch_frame(self, query, params=(), batch_size=1000, cached=False, include_archived=False):
+        """
+        Fetches a query result directly as a pandas DataFrame (columns are kept even when empty).
+
+        `cached=True` and `include_archived=True` work as in fetch_all; the cached DataFrame
+        is shared, so don't modify it in place.
+        """
+        if cached:
+            return self._read_through_cache(
+                "frame+archived" if include_archived else "frame", query, params,
+                lambda: self.fetch_frame(query, params, batch_size, include_archived=include_archived), len,
+            )
+        return pd.DataFrame(self.fetch_columns(query, params, batch_size, include_archived))
+
+    def aggregate(self, table, group_by=None, metrics=("count",), where=None, cached=True, include_archived=False):
+        """
+        Computes grouped metrics in SQLite (GROUP BY) and returns them as a small DataFrame.
+
+        `group_by` is a list of columns, `metrics` a list of specs such as "count",
+        "avg(accuracy)" or "max(run_time_seconds)" (columns are named "count", "avg_accuracy",
+        ...), and `where` an optional {column: value} dict of equality filters. Groups are
+        sorted by the group_by columns. Results go through the shared result cache unless
+        `cached=False`, so repeated dashboard reruns cost nothing until the table changes.
+        `include_archived=True` also counts archived rows.
+        """
+        _check_identifier(table)
+        group_by = list(group_by or [])
+        for column in group_by:
+            _check_identifier(column)
+        select_list = list(group_by)
+        for metric in metrics:
+            expression, alias = _metric_sql(metric)
+            select_list.append(f"{expression} AS {alias}")
+
+        query = f"SELECT {', '.join(select_list)} FROM {table}"
+        params = []
+        if where:
+            for column in where:
+                _check_identifier(column)
+            query += " WHERE " + " AND ".join(f"{column} = ?" for column in where)
+            params = list(where.values())
+        if group_by:
+            query += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        return self.fetch_frame(query, tuple(params), cached=cached, include_archived=include_archived)
+
+    # --- Hot/Cold Archival ---
+    def _with_archived(self, query):
+        """Rewrites `query` so the archivable tables it reads include their archived rows."""
+        tables = [table for table in ARCHIVE_POLICIES if table in tables_read(query)]
+        return with_archived(query, tables, self._archive_columns.__getitem__)
+
+    def archive_closed(self, older_than_days=90, tables=None, batch_size=500, pause=0.05):
+        """Moves finished rows older than `older_than_days` to the archive database; returns {table: rows moved}."""
+        tables = list(tables or ARCHIVE_POLICIES)
+        for table in tables:
+            if table not in ARCHIVE_POLICIES:
+                raise ValueError(f"Table '{table}' has no archive policy. Archivable tables: {', '.join(ARCHIVE_POLICIES)}.")
+        if self.in_transaction():
+            raise RuntimeError("archive_closed commits in batches and cannot run inside a transaction.")
+        moved = {}
+        with self._pool.connection() as conn:
+            for table in tables:
+                moved[table] = archive_table(conn, table, older_than_days, batch_size, pause)
+                if moved[table]:
+                    self._record_write(f"DELETE FROM {table}")
+        self.prune_tombstones(tables=tables)
+        return moved
+
+    def archive_stats(self):
+        """Returns {table: {"hot": rows, "archived": rows}} for every archivable table."""
+        stats = {}
+        with self._get_connection() as conn:
+            for table in ARCHIVE_POLICIES:
+                stats[table] = {
+                    "hot": conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0],
+                    "archived": conn.execute(f"SELECT COUNT(*) FROM archive.{table}").fetchone()[0],
+                }
+        return stats
+
+    # --- Online Snapshots ---
+    def snapshot(self, dest, pages_per_step=256, pause=0.01, compact=False, on_progress=None):
+        """Copies the live database to `dest` in a background thread; returns the SnapshotJob."""
+        return SnapshotJob(
+            self._pool.connect_unpooled, dest, pages_per_step, pause, compact, on_progress
+        ).start()
+
+    # --- Federated Queries ---
+    @contextmanager
+    def federated(self, databases=None, read_only=True):
+        """Yields a Federation: a pooled connection with `databases` ({alias: path}, default legacy) ATTACHed."""
+        if databases is None:
+            databases = {"legacy": LEGACY_DB_PATH}
+        if self.in_transaction():
+            raise RuntimeError("federated() attaches databases and cannot run inside a transaction.")
+        with self._pool.connection() as conn:
+            aliases = attach_databases(conn, databases, read_only)
+            try:
+                yield Federation(conn, aliases, self._stats)
+            finally:
+                detach_databases(conn, aliases)
+
+    # --- Summary Counters ---
+    def summary_counts(self, table, group_by=None):
+        """
+        Returns row counts of a domain table per `group_by` columns, read from its
+        trigger-maintained summary table instead of the table itself.
+
+        `group_by` must be a subset of the summary's key columns (see services.summaries).
+        The result has the same shape as `aggregate(table, group_by)`: the group columns and
+        "count", plus "avg_<column>" for summaries that keep a numeric column. The cost
+        depends on the number of distinct key combinations, not on the table size.
+        """
+        if table not in SUMMARIES:
+            raise ValueError(f"Table '{table}' has no summary. Summarised tables: {', '.join(SUMMARIES)}.")
+        keys, value = SUMMARIES[table]
+        group_by = list(group_by or [])
+        unknown = [column for column in group_by if column not in keys]
+        if unknown:
+            raise ValueError(f"Cannot group {table} summary by {unknown}; key columns are {keys}.")
+
+        select_list = group_by + ["SUM(row_count) AS count"]
+        if value:
+            select_list.append(f"SUM({value}_sum) / NULLIF(SUM({value}_count), 0) AS avg_{value}")
+        query = f"SELECT {', '.join(select_list)} FROM {summary_table(table)} WHERE row_count > 0"
+        if group_by:
+            query += f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}"
+        return self.fetch_frame(query, cached=True)
+
+    def rebuild_summaries(self, tables=None):
+        """Recomputes the summary counters of `tables` (default: all) in one transaction."""
+        tables = list(tables or SUMMARIES)
+        for table in tables:
+            if table not in SUMMARIES:
+                raise ValueError(f"Table '{table}' has no summary. Summarised tables: {', '.join(SUMMARIES)}.")
+        with self.transaction(), self._get_connection() as conn:
+            for table in tables:
+                rebuild_summary(conn, table)
+                self._record_write(f"DELETE FROM {summary_table(table)}")
+
+    # --- Full-Text Search ---
+    def search(self, text, domains=None, limit=20, offset=0):
+        """Full-text searches `domains` (default: all) for `text`; returns domain, id, snippet and rank, best first."""
+        columns = ["domain", "id", "snippet", "rank"]
+        expression = match_expression(text)
+        if expression is None:
+            return pd.DataFrame(columns=columns)
+        domains = list(domains or SEARCH_INDEXES)
+        for table in domains:
+            if table not in SEARCH_INDEXES:
+                raise ValueError(f"Table '{table}' has no search index. Searchable tables: {', '.join(SEARCH_INDEXES)}.")
+
+        frames = []
+        for table in domains:
+            matches = self.fetch_all(match_count_query(table), (expression, RANKED_MATCH_LIMIT))[0]["matches"]
+            if matches:
+                ranked = matches < RANKED_MATCH_LIMIT
+                frames.append(self.fetch_frame(search_query(table, ranked), (expression, offset + limit)))
+        results = pd.concat([frame for frame in frames if not frame.empty] or [pd.DataFrame(columns=columns)])
+        results = results.sort_values("rank", kind="stable", ignore_index=True)
+        return results.iloc[offset:offset + limit].reset_index(drop=True)
+
+    def rebuild_search_indexes(self, tables=None):
+        """Rebuilds the full-text indexes of `tables` (default: all) from the table contents."""
+        tables = list(tables or SEARCH_INDEXES)
+        with self.transaction(), self._get_connection() as conn:
+            for table in tables:
+                rebuild_search_index(conn, table)
+
+    def fetch_page(self, table, order_key="timestamp", after=None, limit=50, columns=None, descending=True, before=None):
+        """
+        Fetches one page of `table` using keyset (seek) pagination.
+
+        Rows are ordered by (`order_key`, id) so ties on the order key are stable. Pass the
+        `next_after` key of the previous result as `after` to go forward, or its `prev_before`
+        key as `before` to go back. The cost is one index seek plus `limit` rows, no matter
+        how deep the page is. Returns a dict with the page `rows` (a DataFrame) and the
+        `next_after` / `prev_before` keys, which are None at either end of the table.
+        """
+        _check_identifier(table)
+        _check_identifier(order_key)
+        columns = list(columns) if columns else []
+        for column in columns:
+            _check_identifier(column)
+        # The cursor keys are read from the page itself, so make sure they are selected
+        selected = columns + [key for key in (order_key, "id") if columns and key not in columns]
+        select_list = ", ".join(selected) if selected else "*"
+
+        backwards = before is not None
+        scan_descending = descending != backwards
+        comparison = "<" if scan_descending else ">"
+        direction = "DESC" if scan_descending else "ASC"
+
+        where, params = "", []
+        seek_key = before if backwards else after
+        if seek_key is not None:
+            where = f"WHERE ({order_key}, id) {comparison} (?, ?)"
+            params = list(seek_key)
+        query = (
+            f"SELECT {select_list} FROM {table} {where} "
+            f"ORDER BY {order_key} {direction}, id {direction} LIMIT ?"
+        )
+        # Ask for one extra row to learn whether another page exists beyond this one
+        data = self.fetch_columns(query, params + [limit + 1])
+        has_more = len(data["id"]) > limit
+        for name in data:
+            del data[name][limit:]
+            if backwards:
+                data[name].reverse()
+
+        keys = list(zip(data[order_key], data["id"]))
+        if backwards:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, seek_key is not None
+        rows = pd.DataFrame(data)
+        if columns:
+            rows = rows[columns]
+        return {
+            "rows": rows,
+            "next_after": keys[-1] if keys and has_next else None,
+            "prev_before": keys[0] if keys and has_prev else None,
+        }
+
+    # --- Streaming Reads (constant memory over large tables) ---
+    def iter_rows(self, query, params=(), chunk_size=1000):
+        """
+        Yields rows one at a time as dicts, reading `chunk_size` rows per fetchmany call.
+
+        The pooled connection stays borrowed until the generator is exhausted or closed,
+        so consume it fully or use it in a `for` loop / `contextlib.closing`.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.execute(query, params)
+            cursor.arraysize = chunk_size
+            columns = [col[0] for col in cursor.description]
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(zip(columns, row))
+
+    def fetch_objects(self, query, params=(), row_factory=None, batch_size=1000):
+        """
+        Fetches a query result as a list of objects built by `row_factory(cursor, row)`
+        (a sqlite3 row factory, e.g. one from services.repositories), `batch_size` rows per
+        fetchmany call. The factory is set on this call's cursor only, so the pooled
+        connection keeps returning plain tuples to everyone else.
+        """
+        objects = []
+        for batch in self.iter_objects(query, params, row_factory, batch_size):
+            objects.extend(batch)
+        return objects
+
+    def iter_objects(self, query, params=(), row_factory=None, batch_size=1000):
+        """
+        Yields the result of `query` as lists of at most `batch_size` objects built by
+        `row_factory`. Like iter_rows, the connection stays borrowed until the generator ends.
+        """
+        started = time.perf_counter()
+        count = 0
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory
+            cursor.execute(query, params)
+            cursor.arraysize = batch_size
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    break
+                count += len(batch)
+                yield batch
+        self._observe(query, params, started, count)
+
+    def iter_frames(self, query, params=(), chunk_size=10000):
+        """Yields the result as a sequence of DataFrames of at most `chunk_size` rows each."""
+        with self._get_connection() as conn:
             cursor = conn.execute(query, params)
+            cursor.arraysize = chunk_size
             columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
-        finally:
-            conn.close()
+            getters = [itemgetter(index) for index in range(len(columns))]
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    break
+                yield pd.DataFrame({name: list(map(getter, batch)) for name, getter in zip(columns, getters)})
 
     # --- Write/Modify Operations (Used by all CRUD forms) ---
     def execute_query(self, query, params=()):
         """Executes an INSERT, UPDATE, or DELETE query."""
-        conn = self._get_connection()
+        in_transaction = self.in_transaction()
+        started = time.perf_counter()
+        if self._writer is not None and not in_transaction:
+            future = self.submit_write(query, params)
+            try:
+                # Timed from submit to commit, so queueing behind other writes is included
+                try:
+                    result = future.result(timeout=self.write_timeout)
+                except FutureTimeoutError:
+                    # Withdraw it so a retry can't write twice; once running, its outcome is worth the wait
+                    if future.cancel():
+                        raise TimeoutError(f"write still queued after {self.write_timeout} s; withdrawn") from None
+                    result = future.result()
+                self._observe(query, params, started, max(result[0], 0))
+                return result
+            except Exception as e:
+                self._stats.record_error(query)
+                print(f"Database error during execution: {e}")
+                return 0, None
+        with self._get_connection() as conn:
+            try:
+                cursor = conn.execute(query, params)
+                if not in_transaction:
+                    conn.commit()
+                self._record_write(query)
+            except Exception as e:
+                self._stats.record_error(query)
+                if in_transaction:
+                    raise # let transaction() roll the whole unit back
+                print(f"Database error during execution: {e}")
+                return 0, None
+        self._observe(query, params, started, max(cursor.rowcount, 0))
+        return cursor.rowcount, cursor.lastrowid # Return rowcount and last row ID
+
+    def submit_write(self, query, params=()):
+        """
+        Queues a write and returns a Future resolving to (rowcount, lastrowid).
+
+        In write-behind mode the future completes once the writer thread has committed the
+        group containing this statement. Otherwise the write runs immediately and an already
+        completed future is returned, so callers can use the same code in both modes.
+        """
+        if self._writer is not None and not self.in_transaction():
+            return self._writer.submit(query, params)
+        future = Future()
         try:
-            cursor = conn.execute(query, params)
-            conn.commit()
-            return cursor.rowcount, cursor.lastrowid # Return rowcount and last row ID
+            with self._get_connection() as conn:
+                cursor = conn.execute(query, params)
+                if not self.in_transaction():
+                    conn.commit()
+                self._record_write(query)
+                future.set_result((cursor.rowcount, cursor.lastrowid))
         except Exception as e:
-            print(f"Database error during execution: {e}")
-            return 0, None
-        finally:
-            conn.close()
+            future.set_exception(e)
+        return future
+
+    def writer_stats(self):
+        """Returns group-commit counters, or None when write-behind mode is off."""
+        return self._writer.stats() if self._writer is not None else None
+
+    def bulk_insert(self, table, columns, rows, batch_size=10000, progress_callback=None):
+        """Inserts an iterable of `rows` in batches under one SAVEPOINT (all or nothing); returns the row count."""
+        _check_identifier(table)
+        for column in columns:
+            _check_identifier(column)
+        placeholders = ", ".join("?" for _ in columns)
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+        inserted = 0
+        rows = iter(rows)
+        in_transaction = self.in_transaction()
+        versioned = table in VERSIONED_TABLES
+        summarised = table in SUMMARIES
+        searchable = table in SEARCH_INDEXES
+        started = time.perf_counter()
+        with self._get_connection() as conn:
+            try:
+                if not in_transaction:
+                    # DDL does not open sqlite3's implicit transaction, so start it explicitly
+                    conn.execute("BEGIN IMMEDIATE")
+                # Undoes the dropped triggers and partial rows on error, even if an outer unit commits later
+                conn.execute("SAVEPOINT bulk_insert")
+                if summarised or searchable:
+                    last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                if summarised:
+                    conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_summary_insert")
+                if searchable:
+                    conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_search_insert")
+                if versioned:
+                    conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_change_insert")
+                    conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = ?", (table,))
+                    version = int(conn.execute(
+                        "SELECT version FROM table_versions WHERE table_name = ?", (table,)
+                    ).fetchone()[0])
+                    query = (
+                        f"INSERT INTO {table} ({', '.join(columns)}, row_version, created_version, updated_at) "
+                        f"VALUES ({placeholders}, {version}, {version}, CURRENT_TIMESTAMP)"
+                    )
+                # One transaction spans every batch until commit()
+                while True:
+                    batch = list(islice(rows, batch_size))
+                    if not batch:
+                        break
+                    conn.executemany(query, batch)
+                    inserted += len(batch)
+                    if progress_callback is not None:
+                        progress_callback(inserted)
+                if versioned:
+                    create_change_trigger(conn, table, "INSERT")
+                if summarised:
+                    add_rows_to_summary(conn, table, "id > ?", (last_id,))
+                    create_summary_trigger(conn, table, "INSERT")
+                if searchable:
+                    add_rows_to_search(conn, table, "id > ?", (last_id,))
+                    create_search_trigger(conn, table, "INSERT")
+                conn.execute("RELEASE SAVEPOINT bulk_insert")
+                if not in_transaction:
+                    conn.commit()
+                self._record_write(query)
+            except Exception as e:
+                self._stats.record_error(query)
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO SAVEPOINT bulk_insert")
+                    conn.execute("RELEASE SAVEPOINT bulk_insert")
+                if in_transaction:
+                    raise
+                conn.rollback()
+                print(f"Database error during bulk insert: {e}")
+                return 0
+        self._observe(query, (), started, inserted, explain=False)
+        return inserted
 
     # --- Authentication Methods (Required by Home.py) ---
     def insert_user(self, username, password_hash):
         """Inserts a new user into the database."""
-        conn = self._get_connection()
-        try:
-            conn.execute(
-                "INSERT INTO users (username, password_hash) VALUES (?, ?)", 
-                (username, password_hash)
-            )
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-        finally:
-            conn.close()
+        in_transaction = self.in_transaction()
+        with self._get_connection() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO users (username, password_hash) VALUES (?, ?)", 
+                    (username, password_hash)
+                )
+                if not in_transaction:
+                    conn.commit()
+                self._record_write("INSERT INTO users")
+                return True
+            except sqlite3.IntegrityError:
+                return False
 
     def get_user(self, username):
         """Retrieves a user's data by username."""
-        conn = self._get_connection()
-        try:
-            cursor = conn.execute(
-                "SELECT username, password_hash FROM users WHERE username = ?", 
-                (username,)
-            )
-            user_data = cursor.fetchone()
-            if user_data:
-                return {'username': user_data[0], 'password_hash': user_data[1]}
-            return None
-        finally:
-            conn.close()
+        query = "SELECT username, password_hash FROM users WHERE username = ?"
+        started = time.perf_counter()
+        with self._get_connection() as conn:
+            user_data = conn.execute(query, (username,)).fetchone()
+        # Recorded after the connection is back in the pool: a slow query's EXPLAIN borrows one
+        self._observe(query, (username,), started, 1 if user_data else 0)
+        if user_data:
+            return {'username': user_data[0], 'password_hash': user_data[1]}
+        return None
             
-    # --- Table Creation (FIXED AND CONSOLIDATED) ---
+    # --- Schema Creation and Migrations ---
     def _create_table(self):
-        """Creates all necessary tables if they do not exist."""
-        conn = self._get_connection()
-        try:
-            # 1. Users table (for Home.py login)
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL
-                );
-            ''')
-            # 2. Security Incidents table (for _🛡️ _Cybersecurity.py)
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS security_incidents (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    incident_type TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    description TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-            ''')
-            # 3. IT Tickets table (for _💻 _IT_Operations.py)
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS it_tickets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    severity TEXT NOT NULL,
-                    status TEXT NOT NULL DEFAULT 'Open',
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-            ''')
-            # 4. ML Experiments table (THE FIX for the current error)
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS ml_experiments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    model_name TEXT NOT NULL,
-                    dataset TEXT NOT NULL,
-                    status TEXT NOT NULL DEFAULT 'Pending',
-                    accuracy REAL,
-                    run_time_seconds INTEGER,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                );
-            ''')
+        """Creates all necessary tables and brings the schema up to the latest version."""
+        # Only the first manager for a file checks the schema, so reruns don't touch it at all
+        with self._schema_lock:
+            columns = self._archive_columns_by_pool.get(self._pool)
+            if columns is None:
+                with self._get_connection() as conn:
+                    if get_version(conn) < LATEST_VERSION and migrate(conn):
+                        self._cache.clear()
+                    columns = self._archive_columns_by_pool[self._pool] = self._sync_archive_tables(conn)
+        # Shared by every manager for this file and updated in place by migrate()
+        self._archive_columns = columns
+
+    def _sync_archive_tables(self, conn):
+        """Creates or extends the archive tables to mirror the hot tables; returns {table: columns}."""
+        ensure_archive_tables(conn)
+        return {table: hot_columns(conn, table) for table in ARCHIVE_POLICIES}
+
+    def schema_version(self):
+        """Returns the schema version recorded in PRAGMA user_version."""
+        with self._get_connection() as conn:
+            return get_version(conn)
+
+    def migrate(self, target=None):
+        """Applies pending migrations up to `target` (default: latest); returns the versions applied."""
+        with self._get_connection() as conn:
+            applied = migrate(conn, target)
+            if applied:
+                # Archive tables mirror the hot tables' columns, so they follow every migration
+                with self._schema_lock:
+                    self._archive_columns.update(self._sync_archive_tables(conn))
+        if applied:
+            self._cache.clear()
+        return applied
+
+    # --- Index Management ---
+    def _create_indexes(self, conn):
+        """Creates every declared index that does not exist yet."""
+        for name, (table, columns) in self.INDEXES.items():
+            create_index(conn, name, table, columns)
+
+    def ensure_indexes(self):
+        """Creates any missing declared indexes and refreshes the planner statistics."""
+        with self._get_connection() as conn:
+            self._create_indexes(conn)
             conn.commit()
-        finally:
-            conn.close()
\ No newline at end of file
+            conn.execute("PRAGMA optimize")
+
+    def list_indexes(self, table):
+        """Returns the names and columns of the indexes defined on `table`."""
+        _check_identifier(table)
+        with self._get_connection() as conn:
+            indexes = []
+            for _, name, *_ in conn.execute(f"PRAGMA index_list({table})").fetchall():
+                columns = [row[2] for row in conn.execute(f"PRAGMA index_info({name})").fetchall()]
+                indexes.append({"name": name, "columns": columns})
+            return indexes
+
+    def explain(self, query, params=()):
+        """
+        Runs EXPLAIN QUERY PLAN for `query` and summarises it.
+
+        Returns a dict with the raw `plan` lines, `uses_index` (True if any step searches or
+        scans through an index), `full_scans` (tables read without any index) and `temp_btree`
+        (True if SQLite has to sort or group in a temporary B-tree).
+        """
+        with self._get_connection() as conn:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
+        uses_index = any(("USING" in line and "INDEX" in line) or "INTEGER PRIMARY KEY" in line for line in plan)
+        full_scans = [
+            line.split()[1] for line in plan
+            if line.startswith("SCAN ") and "USING" not in line and "SUBQUERY" not in line
+        ]
+        return {
+            "plan": plan,
+            "uses_index": uses_index,
+            "full_scans": full_scans,
+            "temp_btree": any("TEMP B-TREE" in line for line in plan),
+        }
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Named SQLite performance profiles.
+
+Each profile is a set of PRAGMA values applied to every new connection.
+All presets use WAL so dashboard readers never wait behind a CRUD write;
+they differ in how hard they trade durability and memory for speed.
+"""
+
+PROFILES = {
+    # Every commit is fsynced; small cache, no memory mapping.
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -2000,           # negative values are KiB (2 MB)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,          # milliseconds
+    },
+    # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the last commits but never corrupts.
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,          # 16 MB
+        "mmap_size": 64 * 1024 ** 2,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Large page cache and mmap for the dashboards' scans and sorts.
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,          # 64 MB
+        "mmap_size": 256 * 1024 ** 2,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+# PRAGMA synchronous and temp_store report numbers; map them back to names
+_SYNCHRONOUS_NAMES = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}
+_TEMP_STORE_NAMES = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}
+
+# Settings are formatted into PRAGMA statements, so text values must come from these
+# allow-lists and the rest must be integers
+_ALLOWED_VALUES = {
+    "journal_mode": ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"),
+    "synchronous": tuple(_SYNCHRONOUS_NAMES.values()),
+    "temp_store": tuple(_TEMP_STORE_NAMES.values()),
+}
+_INTEGER_SETTINGS = ("cache_size", "mmap_size", "busy_timeout")
+
+
+def resolve_profile(profile=None):
+    """
+    Returns the PRAGMA settings for `profile`.
+
+    `profile` may be a preset name, or a dict of overrides on top of the
+    default preset (a "base" key picks a different preset to start from).
+    Unknown names and invalid values raise ValueError.
+    """
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if isinstance(profile, str):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown performance profile '{profile}'. Choose from: {', '.join(PROFILES)}.")
+        return dict(PROFILES[profile])
+
+    overrides = dict(profile)
+    settings = resolve_profile(overrides.pop("base", DEFAULT_PROFILE))
+    unknown = set(overrides) - set(settings)
+    if unknown:
+        raise ValueError(f"Unknown profile settings: {', '.join(sorted(unknown))}.")
+    settings.update(overrides)
+    return _validate(settings)
+
+
+def _validate(settings):
+    """Checks every value against its allow-list or integer type; returns normalised settings."""
+    for name, allowed in _ALLOWED_VALUES.items():
+        value = str(settings[name]).upper()
+        if value not in allowed:
+            raise ValueError(f"Invalid {name} '{settings[name]}'. Choose from: {', '.join(allowed)}.")
+        settings[name] = value
+    for name in _INTEGER_SETTINGS:
+        value = settings[name]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"Invalid {name} {value!r}: must be an integer.")
+    return settings
+
+
+def apply_profile(conn, settings):
+    """Applies resolved profile settings to an open connection."""
+    # journal_mode must be set outside a transaction and is persisted in the file
+    conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+
+
+def read_active_settings(conn):
+    """Reads back the PRAGMA values actually in effect on `conn`."""
+    def pragma(name):
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    return {
+        "journal_mode": pragma("journal_mode").upper(),
+        "synchronous": _SYNCHRONOUS_NAMES.get(pragma("synchronous"), "UNKNOWN"),
+        "cache_size": pragma("cache_size"),
+        "mmap_size": pragma("mmap_size"),
+        "temp_store": _TEMP_STORE_NAMES.get(pragma("temp_store"), "UNKNOWN"),
+        "busy_timeout": pragma("busy_timeout"),
+    }
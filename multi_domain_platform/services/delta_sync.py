@@ -0,0 +1,53 @@
+import pandas as pd
+import streamlit as st
+
+
+def session_copy(frame):
+    """Returns a copy of a loaded (possibly shared, cached) frame that a session may patch, indexed by id."""
+    return frame.set_axis(pd.Index(frame["id"].to_numpy()), axis=0, copy=True)
+
+
+def merge_changes(frame, changes):
+    """
+    Applies a `DatabaseManager.fetch_changes` result to a session_copy frame and returns it.
+
+    Updated rows are overwritten in place through the id index, deleted ids are dropped
+    and new rows are appended (ids only grow, so the frame stays in id order). A row the
+    frame already has is treated as an update, so re-applying a change is harmless. A
+    `resync` result cannot be applied; reload the table instead.
+    """
+    if changes.get("resync"):
+        raise ValueError("The change set needs a full reload.")
+    if changes["deleted"]:
+        frame.drop(index=changes["deleted"], errors="ignore", inplace=True)
+    rows = changes["rows"]
+    if rows.empty:
+        return frame
+    rows = rows[frame.columns].set_axis(pd.Index(rows["id"].to_numpy()), axis=0)
+    known = frame.index.get_indexer(rows.index) >= 0
+    if known.any():
+        updated = rows[known]
+        frame.loc[updated.index, :] = updated
+    if not known.all():
+        frame = pd.concat([frame, rows[~known]])
+    return frame
+
+
+def refresh_session_frame(db, table, state_key, columns, loader):
+    """
+    Brings st.session_state[state_key], a session copy of `table` made by `loader()`, up to
+    date by fetching only the rows changed since its version (kept in `<state_key>_version`).
+    """
+    version_key = f"{state_key}_version"
+    if state_key in st.session_state:
+        changes = db.fetch_changes(table, st.session_state[version_key], columns=columns)
+        # resync: the changes since our version can't be listed, so only a full reload is correct
+        if not changes["resync"]:
+            if changes["version"] != st.session_state[version_key]:
+                st.session_state[state_key] = merge_changes(st.session_state[state_key], changes)
+                st.session_state[version_key] = changes["version"]
+            return
+    # Read the version first: a write landing during the load is simply re-applied as a delta next time
+    version = db.table_version(table)
+    st.session_state[state_key] = session_copy(loader())
+    st.session_state[version_key] = version
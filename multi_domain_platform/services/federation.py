@@ -0,0 +1,141 @@
+"""
+Federated queries across several SQLite files on one connection.
+
+The platform database and the older `DATA/intelligence_platform.db` used by `app/data`
+have different schemas (`security_incidents` vs `cyber_incidents`). Instead of loading
+both into pandas, the other files are ATTACHed to a connection under schema aliases so
+joins and unions across them run inside SQLite in a single pass:
+
+    SELECT severity, COUNT(*) FROM legacy.cyber_incidents GROUP BY severity
+"""
+import os
+import re
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# The database used by app/data/db.py (DATA/intelligence_platform.db at the repository root)
+LEGACY_DB_PATH = str(Path(__file__).resolve().parents[2] / "DATA" / "intelligence_platform.db")
+
+# Schema names SQLite or the platform already use on every connection
+RESERVED_ALIASES = {"main", "temp", "archive"}
+
+_ALIAS_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_QUALIFIED_RE = re.compile(r"^(?:[A-Za-z_][A-Za-z0-9_]*\.)?[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _check_alias(alias):
+    """Rejects schema aliases that are not plain identifiers or clash with built-in schemas."""
+    if not _ALIAS_RE.match(alias):
+        raise ValueError(f"Invalid schema alias: {alias!r}")
+    if alias.lower() in RESERVED_ALIASES:
+        raise ValueError(f"Schema alias '{alias}' is reserved. Reserved aliases: {', '.join(sorted(RESERVED_ALIASES))}.")
+
+
+def attach_databases(conn, databases, read_only=True):
+    """
+    ATTACHes each {alias: path} in `databases` to `conn`. With `read_only=True` (the
+    default) the files are opened with `mode=ro`, so a federated query can never write to
+    another application's database and a missing file raises instead of being created.
+    Returns the list of aliases attached.
+    """
+    attached = []
+    try:
+        for alias, path in databases.items():
+            _check_alias(alias)
+            path = os.path.abspath(path)
+            if read_only and not os.path.exists(path):
+                raise FileNotFoundError(f"Database file not found for '{alias}': {path}")
+            target = f"{Path(path).as_uri()}?mode=ro" if read_only else path
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (target,))
+            attached.append(alias)
+    except Exception:
+        detach_databases(conn, attached)
+        raise
+    return attached
+
+
+def detach_databases(conn, aliases):
+    """DETACHes `aliases` from `conn`, ending any open read transaction first."""
+    if conn.in_transaction:
+        conn.rollback()
+    for alias in aliases:
+        conn.execute(f"DETACH DATABASE {alias}")
+
+
+def list_tables(conn, schemas):
+    """Returns [{"schema", "table", "columns"}] for the user tables of each schema in `schemas`."""
+    tables = []
+    for schema in schemas:
+        names = conn.execute(
+            f"SELECT name FROM {schema}.sqlite_master "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        ).fetchall()
+        for (name,) in names:
+            columns = [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({name})")]
+            tables.append({"schema": schema, "table": name, "columns": columns})
+    return tables
+
+
+def union_all(columns, sources):
+    """
+    Builds a SELECT that stacks tables from several schemas into one result.
+
+    `columns` are the output columns; `sources` maps a label (returned in a leading
+    `source` column) to a schema-qualified table, or to `(table, {column: expression})`
+    for tables whose columns are named differently. Missing columns must be mapped
+    explicitly (e.g. to "NULL"). For example:
+
+        union_all(["id", "date", "severity"], {
+            "platform": ("main.security_incidents", {"date": "timestamp"}),
+            "legacy": "legacy.cyber_incidents",
+        })
+    """
+    selects = []
+    for label, source in sources.items():
+        table, renames = (source, {}) if isinstance(source, str) else source
+        if not _QUALIFIED_RE.match(table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        select_list = ", ".join(
+            f"{renames[column]} AS {column}" if column in renames else column for column in columns
+        )
+        label = label.replace("'", "''")
+        selects.append(f"SELECT '{label}' AS source, {select_list} FROM {table}")
+    return " UNION ALL ".join(selects)
+
+
+class Federation:
+    """
+    A connection with other database files attached, as yielded by
+    `DatabaseManager.federated()`. Queries can read `main.<table>` (the platform database),
+    `archive.<table>` and `<alias>.<table>` for every attached file; unqualified names
+    resolve to main first. Results are never cached, since the attached files are written
+    by other applications.
+    """
+
+    def __init__(self, conn, aliases, stats=None):
+        self.conn = conn
+        self.aliases = list(aliases)
+        self._stats = stats
+
+    def fetch_frame(self, query, params=()):
+        """Runs `query` across the attached databases and returns the result as a DataFrame."""
+        started = time.perf_counter()
+        cursor = self.conn.execute(query, params)
+        names = [col[0] for col in cursor.description]
+        frame = pd.DataFrame.from_records(cursor.fetchall(), columns=names)
+        if self._stats is not None:
+            self._stats.record(
+                query, time.perf_counter() - started, len(frame), params,
+                explain=lambda: self.explain(query, params),
+            )
+        return frame
+
+    def explain(self, query, params=()):
+        """Returns the EXPLAIN QUERY PLAN lines for `query` on this connection."""
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
+
+    def tables(self):
+        """Lists the tables of every attached database (not main) with their columns."""
+        return list_tables(self.conn, self.aliases)
@@ -0,0 +1,366 @@
+"""
+Versioned schema migrations keyed on PRAGMA user_version.
+
+Each migration is a (version, description, function) entry in MIGRATIONS. `migrate`
+applies every entry above the database's current user_version in order, bumping
+user_version after each one, so an existing database is upgraded in place instead of
+being exported and rebuilt. Migrations must only ever be appended, never edited.
+"""
+import sqlite3
+import time
+
+from services.search import SEARCH_INDEXES, create_search_index, create_search_trigger, rebuild_search_index
+from services.summaries import SUMMARIES, add_rows_to_summary, create_summary_table, create_summary_trigger
+
+# Secondary indexes for the dashboards' access paths: name -> (table, indexed columns).
+# (timestamp DESC, id DESC) matches the keyset pagination order exactly.
+INDEXES = {
+    "idx_security_incidents_timestamp": ("security_incidents", "timestamp DESC, id DESC"),
+    "idx_security_incidents_status_severity": ("security_incidents", "status, severity"),
+    "idx_security_incidents_severity": ("security_incidents", "severity"),
+    "idx_security_incidents_type": ("security_incidents", "incident_type"),
+    "idx_it_tickets_timestamp": ("it_tickets", "timestamp DESC, id DESC"),
+    "idx_it_tickets_status_severity": ("it_tickets", "status, severity"),
+    "idx_it_tickets_severity": ("it_tickets", "severity"),
+    "idx_ml_experiments_timestamp": ("ml_experiments", "timestamp DESC, id DESC"),
+    "idx_ml_experiments_status": ("ml_experiments", "status"),
+    "idx_ml_experiments_model_name": ("ml_experiments", "model_name"),
+    "idx_ml_experiments_dataset": ("ml_experiments", "dataset"),
+}
+
+
+# Domain tables whose data version is tracked in table_versions
+VERSIONED_TABLES = ("security_incidents", "it_tickets", "ml_experiments")
+
+
+# --- Online Schema Helpers ---
+
+def column_exists(conn, table, column):
+    """Returns True if `table` already has `column`."""
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def add_column(conn, table, column, definition):
+    """
+    Adds a column if it is missing. SQLite only rewrites the schema entry, not the rows,
+    so this is instant even on large tables. The default must be a constant; use
+    `backfill_column` afterwards to compute values for existing rows.
+    """
+    if not column_exists(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def create_index(conn, name, table, columns):
+    """Creates an index if it does not exist yet."""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def create_version_trigger(conn, table, event):
+    """Creates the trigger that bumps `table`'s data version after each row INSERT/UPDATE/DELETE."""
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+        END;
+    ''')
+
+
+def create_change_trigger(conn, table, event):
+    """
+    Creates the change-tracking trigger for `table` and `event` (INSERT, UPDATE or DELETE).
+
+    Every trigger bumps the table's data version. Inserts and updates stamp the row with
+    that version and `updated_at`; deletes leave a tombstone in deleted_rows. The UPDATE
+    trigger ignores the stamping UPDATE itself (row_version changed) to avoid a double bump.
+    """
+    bump = f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';"
+    current = f"(SELECT version FROM table_versions WHERE table_name = '{table}')"
+    if event == "INSERT":
+        when = ""
+        body = (
+            f"UPDATE {table} SET row_version = {current}, created_version = {current}, "
+            f"updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;"
+        )
+    elif event == "UPDATE":
+        when = "WHEN NEW.row_version IS OLD.row_version"
+        body = f"UPDATE {table} SET row_version = {current}, updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;"
+    else:
+        when = ""
+        body = (
+            f"INSERT OR REPLACE INTO deleted_rows (table_name, row_id, version, deleted_at) "
+            f"VALUES ('{table}', OLD.id, {current}, CURRENT_TIMESTAMP);"
+        )
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_change_{event.lower()}
+        AFTER {event} ON {table} {when}
+        BEGIN
+            {bump}
+            {body}
+        END;
+    ''')
+
+
+def prune_tombstones(conn, table, before_version):
+    """
+    Deletes `table`'s tombstones with a version below `before_version` and raises the
+    table's tombstone_floor to match, so fetch_changes can tell a caller whose
+    since_version predates the pruned deletes to reload in full. Returns the number of
+    tombstones removed. The caller owns the transaction.
+    """
+    removed = conn.execute(
+        "DELETE FROM deleted_rows WHERE table_name = ? AND version < ?", (table, before_version)
+    ).rowcount
+    conn.execute(
+        "UPDATE table_versions SET tombstone_floor = MAX(tombstone_floor, ?) WHERE table_name = ?",
+        (before_version - 1, table),
+    )
+    return removed
+
+
+def backfill_column(conn, table, column, expression, batch_size=5000, pause=0.0):
+    """
+    Sets `column = expression` for every row where it is still NULL, `batch_size` rows at a
+    time with a commit after each batch, so the write lock is only held briefly. Safe to
+    re-run after an interruption: finished rows are no longer NULL.
+    """
+    last_id = 0
+    while True:
+        row = conn.execute(
+            f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?)",
+            (last_id, batch_size),
+        ).fetchone()
+        if row[0] is None:
+            break
+        conn.execute(
+            f"UPDATE {table} SET {column} = {expression} WHERE id > ? AND id <= ? AND {column} IS NULL",
+            (last_id, row[0]),
+        )
+        conn.commit()
+        last_id = row[0]
+        if pause:
+            time.sleep(pause)
+
+
+def rewrite_table(conn, table, create_sql, column_map, batch_size=5000, pause=0.0):
+    """
+    Rebuilds `table` with a new definition, e.g. to change a column's type.
+
+    `create_sql` is the new CREATE TABLE statement written for a table called
+    `<table>__rewrite`; `column_map` maps each new column to an SQL expression over the
+    old columns (e.g. {"accuracy": "CAST(accuracy AS REAL)"}). Rows are copied in id order,
+    `batch_size` at a time with a commit after each batch, and the copy resumes where it
+    stopped if interrupted. The final catch-up copy, swap and rename run in one short
+    transaction. Indexes and triggers on the old table are dropped with it and must be
+    re-created by the calling migration. Rows updated in the old table after they were
+    copied are not re-copied, so run type-change rewrites while writes are paused.
+    """
+    new_table = f"{table}__rewrite"
+    conn.execute(create_sql)
+    conn.commit()
+
+    targets = ", ".join(column_map)
+    sources = ", ".join(column_map.values())
+    copy_sql = (
+        f"INSERT INTO {new_table} ({targets}) SELECT {sources} FROM {table} "
+        f"WHERE id > ? ORDER BY id LIMIT ?"
+    )
+
+    while True:
+        last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {new_table}").fetchone()[0]
+        copied = conn.execute(copy_sql, (last_id, batch_size)).rowcount
+        conn.commit()
+        if copied < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    conn.execute("BEGIN IMMEDIATE")
+    last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {new_table}").fetchone()[0]
+    conn.execute(copy_sql, (last_id, -1))  # LIMIT -1 copies everything inserted meanwhile
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    conn.commit()
+
+
+# --- Migration Steps ---
+
+def _create_base_tables(conn):
+    """Version 1: the original four tables (matches databases created before migrations)."""
+    # 1. Users table (for Home.py login)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL
+        );
+    ''')
+    # 2. Security Incidents table (for _🛡️ _Cybersecurity.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS security_incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            incident_type TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            status TEXT NOT NULL,
+            description TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    # 3. IT Tickets table (for _💻 _IT_Operations.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS it_tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'Open',
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+    # 4. ML Experiments table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ml_experiments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            model_name TEXT NOT NULL,
+            dataset TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'Pending',
+            accuracy REAL,
+            run_time_seconds INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+
+
+def _create_secondary_indexes(conn):
+    """Version 2: indexes for the dashboards' sorts and filters."""
+    for name, (table, columns) in INDEXES.items():
+        create_index(conn, name, table, columns)
+
+
+def _create_table_versions(conn):
+    """Version 3: per-table data version counters bumped by triggers on every row change."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+    ''')
+    for table in VERSIONED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            create_version_trigger(conn, table, event)
+
+
+def _track_row_changes(conn):
+    """
+    Version 4: per-row change tracking for delta sync. Adds row_version / created_version
+    (the table version that last changed / created the row) and updated_at to each tracked
+    table, a deleted_rows tombstone log, and replaces the version-3 triggers with ones that
+    also stamp rows and record deletes.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS deleted_rows (
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (table_name, version, row_id)
+        ) WITHOUT ROWID;
+    ''')
+    for table in VERSIONED_TABLES:
+        # Existing rows count as unchanged since version 0
+        add_column(conn, table, "row_version", "INTEGER NOT NULL DEFAULT 0")
+        add_column(conn, table, "created_version", "INTEGER NOT NULL DEFAULT 0")
+        add_column(conn, table, "updated_at", "DATETIME")
+        # Drop the old triggers before the backfill so it doesn't stamp every row as changed
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version_{event.lower()}")
+    conn.commit()
+    for table in VERSIONED_TABLES:
+        backfill_column(conn, table, "updated_at", "COALESCE(timestamp, CURRENT_TIMESTAMP)")
+    conn.execute("BEGIN IMMEDIATE")
+    for table in VERSIONED_TABLES:
+        create_index(conn, f"idx_{table}_row_version", table, "row_version")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            create_change_trigger(conn, table, event)
+        # Writes made during the backfill went uncounted; one bump makes every copy reload
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = ?", (table,))
+
+def _create_summaries(conn):
+    """Version 5: trigger-maintained summary counters for the dashboard tiles, filled in one pass."""
+    for table in SUMMARIES:
+        create_summary_table(conn, table)
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            create_summary_trigger(conn, table, event)
+        add_rows_to_summary(conn, table)
+
+
+def _create_search_indexes(conn):
+    """Version 6: FTS5 full-text indexes over the domain tables' text columns, kept in sync by triggers."""
+    for table in SEARCH_INDEXES:
+        create_search_index(conn, table)
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            create_search_trigger(conn, table, event)
+        rebuild_search_index(conn, table)
+
+
+def _add_tombstone_floor(conn):
+    """
+    Version 7: table_versions.tombstone_floor, the highest data version whose tombstones
+    have been pruned from deleted_rows (0 = none). Changes since an older version can no
+    longer be listed completely.
+    """
+    add_column(conn, "table_versions", "tombstone_floor", "INTEGER NOT NULL DEFAULT 0")
+
+
+# Ordered list of (version, description, function). Append only.
+MIGRATIONS = [
+    (1, "Create base tables", _create_base_tables),
+    (2, "Create secondary indexes", _create_secondary_indexes),
+    (3, "Track per-table data versions", _create_table_versions),
+    (4, "Track row changes and deletes for delta sync", _track_row_changes),
+    (5, "Create trigger-maintained summary counters", _create_summaries),
+    (6, "Create full-text search indexes", _create_search_indexes),
+    (7, "Record how far tombstones have been pruned", _add_tombstone_floor),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- Runner ---
+
+def get_version(conn):
+    """Returns the schema version stored in PRAGMA user_version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=None, migrations=MIGRATIONS):
+    """
+    Applies every pending migration up to `target` (default: the latest) and returns
+    the list of versions applied. Each step and its user_version bump commit together;
+    BEGIN IMMEDIATE plus a re-check stops two processes from applying the same step.
+    """
+    target = migrations[-1][0] if target is None else target
+    if get_version(conn) >= target:
+        return []
+
+    applied = []
+    for version, description, step in migrations:
+        if version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(conn) >= version:
+                conn.rollback()
+                continue
+            step(conn)
+            # Batched helpers commit as they go, so the step may have left no transaction open
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            raise RuntimeError(f"Migration {version} ({description}) failed: {e}") from e
+        applied.append(version)
+    return applied
@@ -0,0 +1,34 @@
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def display_paginated_table(db, table, columns, state_key, height=350):
+    """
+    Renders one keyset-paginated page of `table` with Previous/Next and page-size controls.
+
+    Only the visible page is read from the database and sent to the browser. The stack of
+    `after` keys for the pages already visited lives in st.session_state[state_key].
+    """
+    page_size_key = f"{state_key}_page_size"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = [None]
+
+    def reset_pages():
+        st.session_state[state_key] = [None]
+
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=page_size_key, on_change=reset_pages)
+
+    cursors = st.session_state[state_key]
+    page = db.fetch_page(table, order_key="timestamp", after=cursors[-1], limit=page_size, columns=columns)
+
+    st.dataframe(page["rows"], use_container_width=True, height=height)
+
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("◀ Previous", key=f"{state_key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    info_col.caption(f"Page {len(cursors)} · {len(page['rows'])} rows")
+    if next_col.button("Next ▶", key=f"{state_key}_next", disabled=page["next_after"] is None):
+        cursors.append(page["next_after"])
+        st.rerun()
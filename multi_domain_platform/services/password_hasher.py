@@ -0,0 +1,121 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hash/check requests are already pending."""
+
+
+class HasherTimeoutError(Exception):
+    """Raised when a hash/check request does not finish within the timeout."""
+
+
+class PasswordHasher:
+    """
+    Bounded worker pool for bcrypt.
+
+    A bcrypt check costs a few hundred milliseconds of CPU. Run inline on every Streamlit
+    script thread, a burst of logins starts one bcrypt per session at once: every login
+    then takes as long as the whole burst, and every other session's rerun competes for
+    the same cores. Here at most `workers` (default: one per core) run at a time. bcrypt
+    releases the GIL, so threads are enough to use every core. Up to `max_pending`
+    (default: 4 per worker) further requests wait in the queue; beyond that a request
+    fails at once with HasherBusyError, and a caller waits at most `timeout` seconds for
+    its result.
+    """
+
+    # One pool per process, shared by every AuthManager (i.e. every session)
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, workers=None, max_pending=None, timeout=10.0, window=1000):
+        self.workers = workers or os.cpu_count() or 1
+        # A short queue keeps the worst-case wait near a second instead of past the timeout
+        self.max_pending = 4 * self.workers if max_pending is None else max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        # Slots for running plus queued requests
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self._stats_lock = threading.Lock()
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+
+    @classmethod
+    def shared(cls, **kwargs):
+        """Returns the process-wide pool, creating it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(**kwargs)
+                atexit.register(cls._shared.shutdown)
+            return cls._shared
+
+    # --- Public API ---
+    def hash(self, password):
+        """Returns the bcrypt hash (str) of `password`."""
+        hashed = self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt())
+        return hashed.decode("utf-8")
+
+    def check(self, password, password_hash):
+        """True if `password` matches the bcrypt `password_hash`."""
+        return self._run(bcrypt.checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+    def shutdown(self):
+        """Stops the worker threads once queued requests have finished."""
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Returns counters and end-to-end latency percentiles (queue wait + bcrypt) in ms."""
+        with self._stats_lock:
+            ordered = sorted(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+            }
+        if ordered:
+            stats.update({
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+            })
+        return stats
+
+    # --- Internals ---
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            raise HasherBusyError(f"{self.workers + self.max_pending} password checks already pending; try again shortly.")
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._in_flight += 1
+        future = self._executor.submit(func, *args)
+        # The slot is freed when the work ends, even if the caller stopped waiting for it
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._stats_lock:
+                self._timeouts += 1
+            raise HasherTimeoutError(f"Password check did not finish within {self.timeout} s.") from None
+        with self._stats_lock:
+            self._completed += 1
+            self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def _release(self, future):
+        with self._stats_lock:
+            self._in_flight -= 1
+        self._slots.release()
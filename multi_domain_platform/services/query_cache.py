@@ -0,0 +1,194 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Tables a query reads: FROM / JOIN targets (including those inside subqueries), with every
+# table of a comma-separated FROM list. A reference is [schema.]table [[AS] alias].
+_NAME = r"[A-Za-z_][A-Za-z0-9_]*"
+_CLAUSE_KEYWORDS = (
+    r"(?:JOIN|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|OUTER|ON|USING|WHERE|GROUP|HAVING|WINDOW|ORDER"
+    r"|LIMIT|UNION|EXCEPT|INTERSECT|INDEXED|NOT)\b"
+)
+_TABLE_REF = rf"(?:{_NAME}\.)?{_NAME}(?:\s+(?:AS\s+)?(?!{_CLAUSE_KEYWORDS}){_NAME})?"
+_READ_TABLES_RE = re.compile(rf"\b(?:FROM|JOIN)\s+({_TABLE_REF}(?:\s*,\s*{_TABLE_REF})*)", re.IGNORECASE)
+_TABLE_NAME_RE = re.compile(rf"(?:{_NAME}\.)?({_NAME})")
+# Table a write statement modifies
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+([A-Za-z_][A-Za-z0-9_]*)",
+    re.IGNORECASE,
+)
+
+
+def tables_read(query):
+    """Returns the set of table names a SELECT reads from (lower-cased, without schema)."""
+    return {
+        _TABLE_NAME_RE.match(reference.strip()).group(1).lower()
+        for references in _READ_TABLES_RE.findall(query)
+        for reference in references.split(",")
+    }
+
+
+def table_written(query):
+    """Returns the table an INSERT/UPDATE/DELETE modifies, or None if it can't tell."""
+    match = _WRITE_TABLE_RE.match(query)
+    return match.group(1).lower() if match else None
+
+
+class QueryCache:
+    """
+    Size-bounded LRU cache of query results, invalidated per table.
+
+    Entries are keyed by (kind, SQL, params) and remember which tables the query reads.
+    A write to a table drops only the entries that read it (plus entries reading tables
+    registered as its dependents, e.g. trigger-maintained tables). A per-table generation
+    counter stops a read that raced with a write from storing a stale result.
+
+    That only sees writes made through this cache's managers. For writes from elsewhere
+    (another process, app/data), an entry can carry a `version` token (e.g. the data
+    versions of the tables it reads): a lookup with a different token is a miss. Entries
+    older than `ttl` seconds are misses too, which bounds staleness for tables without a
+    data version.
+
+    Cached results are shared between sessions and must be treated as read-only.
+    """
+
+    # One cache per connection pool (and therefore per database file)
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, max_entries=256, max_rows=500_000, ttl=60.0):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (value, tables, row_count, version, stored at)
+        self._by_table = {}             # table -> set of keys
+        self._generations = {}          # table -> int
+        self._dependents = {}           # table -> set of tables changed by its triggers
+        self._rows = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._stale = 0
+
+    @classmethod
+    def for_pool(cls, pool, **kwargs):
+        """Returns the shared cache for `pool`, creating it on first use."""
+        with cls._caches_lock:
+            cache = cls._caches.get(pool)
+            if cache is None:
+                cache = cls(**kwargs)
+                cls._caches[pool] = cache
+            return cache
+
+    # --- Lookups ---
+    def snapshot(self, tables):
+        """Captures the current generations of `tables`; pass the result to `put`."""
+        with self._lock:
+            return {table: self._generations.get(table, 0) for table in tables}
+
+    def get(self, key, version=None):
+        """
+        Returns (True, value) on a hit or (False, None) on a miss. An entry stored with a
+        different `version` or older than the TTL is dropped and counts as a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None
+            if entry[3] != version or (self.ttl is not None and time.monotonic() - entry[4] > self.ttl):
+                self._remove(key)
+                self._stale += 1
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, snapshot, row_count, version=None):
+        """
+        Stores a result unless one of its tables was written since `snapshot` was taken.
+        `version` is the token read before the result was loaded; pass the same to `get`.
+        """
+        if row_count > self.max_rows:
+            return
+        with self._lock:
+            if any(self._generations.get(table, 0) != gen for table, gen in snapshot.items()):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, tuple(snapshot), row_count, version, time.monotonic())
+            self._rows += row_count
+            for table in snapshot:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    # --- Invalidation ---
+    def add_dependency(self, table, dependent):
+        """Declares that writing `table` also changes `dependent` (e.g. through a trigger)."""
+        with self._lock:
+            self._dependents.setdefault(table.lower(), set()).add(dependent.lower())
+
+    def invalidate(self, table):
+        """Drops every entry that reads `table` or one of its dependents."""
+        with self._lock:
+            pending, seen = [table.lower()], set()
+            while pending:
+                current = pending.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                pending.extend(self._dependents.get(current, ()))
+                self._generations[current] = self._generations.get(current, 0) + 1
+                for key in list(self._by_table.get(current, ())):
+                    self._remove(key)
+                    self._invalidations += 1
+
+    def invalidate_for_write(self, query):
+        """Invalidates the table a write statement touches; clears everything if unknown."""
+        table = table_written(query)
+        if table is None:
+            self.clear()
+        else:
+            self.invalidate(table)
+
+    def clear(self):
+        """Drops every entry and bumps every known generation."""
+        with self._lock:
+            for table in set(self._generations) | set(self._by_table):
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self._rows = 0
+
+    def _remove(self, key):
+        """Removes one entry. Caller must hold the lock."""
+        _, tables, row_count, _, _ = self._entries.pop(key)
+        self._rows -= row_count
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+
+    def stats(self):
+        """Returns hit/miss/eviction counters (stale = misses on an outdated entry) and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "stale": self._stale,
+            }
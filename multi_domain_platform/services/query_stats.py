@@ -0,0 +1,155 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Literals are replaced so calls that differ only in their values share one fingerprint
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """Normalises a query (literals -> ?, IN lists collapsed, whitespace squeezed) for grouping."""
+    normalised = _STRING_RE.sub("?", query)
+    normalised = _NUMBER_RE.sub("?", normalised)
+    normalised = _IN_LIST_RE.sub("IN (...)", normalised)
+    return _SPACE_RE.sub(" ", normalised).strip()
+
+
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class _FingerprintStats:
+    """Counters for one query fingerprint. Latencies keep only the most recent `window` calls."""
+    __slots__ = ("calls", "errors", "rows", "total_seconds", "max_seconds", "latencies")
+
+    def __init__(self, window):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.latencies = deque(maxlen=window)
+
+
+class QueryStats:
+    """
+    Per-fingerprint query timings and a slow-query log.
+
+    Every instrumented query records its latency and row count under its fingerprint.
+    Percentiles are computed from the last `window` calls when stats are read, so
+    recording stays a lock, a dict lookup and a deque append. Queries slower than
+    `slow_threshold` seconds are also logged (to this module's logger and to an in-memory
+    ring of `slow_log_size` entries) together with their EXPLAIN QUERY PLAN.
+    """
+
+    # One collector per connection pool (and therefore per database file)
+    _collectors = {}
+    _collectors_lock = threading.Lock()
+
+    def __init__(self, slow_threshold=0.1, window=1000, slow_log_size=100):
+        self.slow_threshold = slow_threshold
+        self.window = window
+        self._lock = threading.Lock()
+        self._by_fingerprint = {}
+        self._slow = deque(maxlen=slow_log_size)
+
+    @classmethod
+    def for_pool(cls, pool, **kwargs):
+        """Returns the shared collector for `pool`, creating it on first use."""
+        with cls._collectors_lock:
+            collector = cls._collectors.get(pool)
+            if collector is None:
+                collector = cls(**kwargs)
+                cls._collectors[pool] = collector
+            return collector
+
+    # --- Recording ---
+    def record(self, query, seconds, rows=0, params=(), explain=None):
+        """
+        Records one call. If it was slow, `explain()` (returning the plan lines) is called to
+        capture the plan for the slow-query log; it is never called for fast queries.
+        """
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._by_fingerprint.get(key)
+            if stats is None:
+                stats = self._by_fingerprint[key] = _FingerprintStats(self.window)
+            stats.calls += 1
+            stats.rows += rows
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.latencies.append(seconds)
+
+        if seconds >= self.slow_threshold:
+            try:
+                plan = explain() if explain is not None else []
+            except Exception as e:
+                plan = [f"(plan unavailable: {e})"]
+            entry = {
+                "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "fingerprint": key,
+                "query": _SPACE_RE.sub(" ", query).strip(),
+                "params": repr(params)[:200],
+                "ms": round(seconds * 1000, 1),
+                "rows": rows,
+                "plan": plan,
+            }
+            with self._lock:
+                self._slow.append(entry)
+            logger.warning("Slow query (%.1f ms, %d rows): %s | plan: %s", entry["ms"], rows, entry["query"], "; ".join(plan))
+
+    def record_error(self, query):
+        """Counts a failed call under the query's fingerprint."""
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._by_fingerprint.get(key)
+            if stats is None:
+                stats = self._by_fingerprint[key] = _FingerprintStats(self.window)
+            stats.errors += 1
+
+    # --- Reading ---
+    def top(self, limit=10, sort_by="total_ms"):
+        """
+        Returns up to `limit` fingerprints as dicts (calls, errors, rows, total/avg/p50/p95/p99/max
+        in ms), ordered by `sort_by` descending.
+        """
+        with self._lock:
+            snapshot = [
+                (key, stats.calls, stats.errors, stats.rows, stats.total_seconds, stats.max_seconds, sorted(stats.latencies))
+                for key, stats in self._by_fingerprint.items()
+            ]
+        report = []
+        for key, calls, errors, rows, total, longest, ordered in snapshot:
+            entry = {"query": key, "calls": calls, "errors": errors, "rows": rows, "total_ms": round(total * 1000, 1)}
+            if ordered:
+                entry.update({
+                    "avg_ms": round(total * 1000 / calls, 2),
+                    "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+                    "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+                    "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+                    "max_ms": round(longest * 1000, 2),
+                })
+            report.append(entry)
+        report.sort(key=lambda entry: entry.get(sort_by, 0), reverse=True)
+        return report[:limit]
+
+    def slow_queries(self, limit=20):
+        """Returns the most recent slow-query log entries, newest first."""
+        with self._lock:
+            return list(reversed(self._slow))[:limit]
+
+    def reset(self):
+        """Clears all counters and the slow-query log."""
+        with self._lock:
+            self._by_fingerprint.clear()
+            self._slow.clear()
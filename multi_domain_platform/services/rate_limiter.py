@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimitedError(Exception):
+    """Raised when a key has used up its attempts; `retry_after` is the wait in seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """
+    In-memory token buckets, one per key (e.g. a username or a client address).
+
+    Each bucket holds up to `capacity` tokens and refills at `refill_rate` tokens per
+    second; an attempt takes one token or is rejected. Checking a key is a dict lookup and
+    some arithmetic, so rejected attempts cost next to nothing. At most `max_keys` keys are
+    tracked. To make room only a bucket idle long enough to have refilled is forgotten (so
+    forgetting it changes nothing); if there is none, attempts from new keys are rejected
+    rather than letting a flood of new keys reset an exhausted bucket.
+    """
+
+    # Named limiters shared by every session in the process
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, capacity, refill_rate, max_keys=10000):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, last refill time], least recently used first
+        # Seconds an untouched bucket takes to refill completely
+        self._refill_time = capacity / refill_rate
+        self._allowed = 0
+        self._rejected = 0
+
+    @classmethod
+    def shared(cls, name, **kwargs):
+        """Returns the process-wide limiter called `name`, creating it on first use."""
+        with cls._shared_lock:
+            limiter = cls._shared.get(name)
+            if limiter is None:
+                limiter = cls._shared[name] = cls(**kwargs)
+            return limiter
+
+    def try_acquire(self, key):
+        """Takes a token for `key`. Returns 0.0 if allowed, else the seconds until a token is free."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    # The least recently used bucket is the idlest; if it hasn't refilled, none has
+                    oldest = next(iter(self._buckets.values()))
+                    idle = now - oldest[1]
+                    if idle < self._refill_time:
+                        self._rejected += 1
+                        return self._refill_time - idle
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [float(self.capacity), now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self._allowed += 1
+                return 0.0
+            self._rejected += 1
+            return (1 - bucket[0]) / self.refill_rate
+
+    def reset(self, key=None):
+        """Refills `key`'s bucket (e.g. after a successful login), or forgets every key."""
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+    def stats(self):
+        """Returns the number of tracked keys and the allowed/rejected counters."""
+        with self._lock:
+            return {"keys": len(self._buckets), "allowed": self._allowed, "rejected": self._rejected}
@@ -0,0 +1,115 @@
+"""
+Repositories that load domain rows straight into model objects.
+
+Each repository selects its table's columns in the order the model's constructor takes
+them and installs a sqlite3 row factory on the cursor, so every fetched row becomes a
+model instance (the `__slots__` classes in models/) or a namedtuple record without an
+intermediate dict. Loading is batched through DatabaseManager.iter_objects. For work over
+many rows at once, `load_batch` returns a columnar batch (models/batches.py) instead.
+"""
+from collections import namedtuple
+
+from models.batches import ExperimentBatch, IncidentBatch, TicketBatch
+from models.it_tickets import ITTicket
+from models.ml_experiment import ExperimentRecord
+from models.security_incident import SecurityIncident
+from models.user import User
+
+
+def model_factory(model):
+    """Returns a sqlite3 row factory that builds `model(*row)` for every row."""
+    def build(cursor, row):
+        return model(*row)
+    return build
+
+
+def record_type(name, columns):
+    """Returns a namedtuple class for rows with `columns`, for tables that have no model class."""
+    return namedtuple(name, columns)
+
+
+def record_factory(record):
+    """Returns a sqlite3 row factory that builds namedtuple `record`s (tuple.__new__, no __init__)."""
+    make = record._make
+
+    def build(cursor, row):
+        return make(row)
+    return build
+
+
+class Repository:
+    """
+    Base repository. Subclasses set `table`, `columns` (SELECT expressions in constructor
+    argument order), `factory` (a row factory) and optionally `batch_type`.
+    """
+    table = None
+    columns = ()
+    factory = None
+    batch_type = None
+    order_by = "timestamp DESC, id DESC"
+
+    def __init__(self, db, batch_size=1000):
+        self.db = db
+        self.batch_size = batch_size
+
+    def _select(self, where=None, limit=None):
+        query = f"SELECT {', '.join(self.columns)} FROM {self.table}"
+        if where:
+            query += f" WHERE {where}"
+        query += f" ORDER BY {self.order_by}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        return query
+
+    def all(self, where=None, params=(), limit=None):
+        """Returns every row (optionally filtered by an SQL `where` with `params`) as objects."""
+        return self.db.fetch_objects(self._select(where, limit), params, self.factory, self.batch_size)
+
+    def iter_batches(self, where=None, params=()):
+        """Yields the rows as lists of at most `batch_size` objects."""
+        return self.db.iter_objects(self._select(where), params, self.factory, self.batch_size)
+
+    def load_batch(self, where=None, params=()):
+        """Returns the rows as one columnar batch (`batch_type`), fetched column-wise."""
+        return self.batch_type.from_columns(self.db.fetch_columns(self._select(where), params, self.batch_size))
+
+    def get(self, row_id):
+        """Returns the object with primary key `row_id`, or None."""
+        found = self.db.fetch_objects(self._select("id = ?"), (row_id,), self.factory, 1)
+        return found[0] if found else None
+
+
+class IncidentRepository(Repository):
+    table = "security_incidents"
+    columns = ("id", "incident_type", "severity", "status", "description", "timestamp")
+    factory = staticmethod(model_factory(SecurityIncident))
+    batch_type = IncidentBatch
+
+
+class TicketRepository(Repository):
+    table = "it_tickets"
+    # it_tickets has no assignee column yet
+    columns = ("id", "title", "severity AS priority", "status", "NULL AS assigned_to", "timestamp")
+    factory = staticmethod(model_factory(ITTicket))
+    batch_type = TicketBatch
+
+
+class ExperimentRepository(Repository):
+    # Experiments have no behaviour, so rows load as ExperimentRecord namedtuples
+    table = "ml_experiments"
+    columns = ExperimentRecord._fields
+    factory = staticmethod(record_factory(ExperimentRecord))
+    batch_type = ExperimentBatch
+
+
+class UserRepository(Repository):
+    table = "users"
+    # users has no role column; every account gets the model's default role
+    columns = ("username", "password_hash")
+    factory = staticmethod(model_factory(User))
+    order_by = "id"
+
+    def get_by_username(self, username):
+        """Returns the User with `username`, or None."""
+        found = self.db.fetch_objects(self._select("username = ?"), (username,), self.factory, 1)
+        return found[0] if found else None
@@ -0,0 +1,118 @@
+"""
+Full-text search over the domain tables with SQLite FTS5.
+
+Each domain table has an external-content FTS5 index (`<table>_fts`) over its text
+columns. The index stores only the tokens; the text itself stays in the domain table and
+is read back through the rowid (= id) for snippets. INSERT/UPDATE/DELETE triggers keep
+the index in sync.
+"""
+import re
+
+# Domain table -> indexed text columns
+SEARCH_INDEXES = {
+    "security_incidents": ["description", "incident_type"],
+    "it_tickets": ["title"],
+    "ml_experiments": ["model_name", "dataset"],
+}
+
+# Above this many matches in one domain, results come back newest first instead of by bm25
+RANKED_MATCH_LIMIT = 10000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_table(table):
+    """Returns the name of the FTS5 index for `table`."""
+    return f"{table}_fts"
+
+
+def match_expression(text):
+    """
+    Turns free text typed by a user into a safe FTS5 MATCH expression: every word must
+    match (implicit AND) and the last one also matches as a prefix, so results appear
+    while typing. Returns None if the text contains no searchable words.
+    """
+    words = _TOKEN_RE.findall(text or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def create_search_index(conn, table):
+    """Creates the FTS5 index for `table` if it does not exist yet."""
+    columns = SEARCH_INDEXES[table]
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {search_table(table)} USING fts5(
+            {", ".join(columns)},
+            content='{table}', content_rowid='id',
+            prefix='2 3'
+        );
+    ''')
+
+
+def create_search_trigger(conn, table, event):
+    """Creates the trigger that keeps `table`'s FTS index in sync for `event` (INSERT, UPDATE or DELETE)."""
+    columns = SEARCH_INDEXES[table]
+    index = search_table(table)
+    column_list = ", ".join(columns)
+    add = f"INSERT INTO {index} (rowid, {column_list}) VALUES (NEW.id, {', '.join(f'NEW.{c}' for c in columns)});"
+    remove = (
+        f"INSERT INTO {index} ({index}, rowid, {column_list}) "
+        f"VALUES ('delete', OLD.id, {', '.join(f'OLD.{c}' for c in columns)});"
+    )
+    if event == "INSERT":
+        header, body = f"AFTER INSERT ON {table}", add
+    elif event == "DELETE":
+        header, body = f"AFTER DELETE ON {table}", remove
+    else:
+        # Only changes to the indexed text need re-indexing
+        header = f"AFTER UPDATE OF {column_list} ON {table}"
+        body = f"{remove}\n            {add}"
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_search_{event.lower()}
+        {header}
+        BEGIN
+            {body}
+        END;
+    ''')
+
+
+def add_rows_to_search(conn, table, where="1", params=()):
+    """Indexes the rows of `table` matching `where` in one statement."""
+    column_list = ", ".join(SEARCH_INDEXES[table])
+    conn.execute(
+        f"INSERT INTO {search_table(table)} (rowid, {column_list}) "
+        f"SELECT id, {column_list} FROM {table} WHERE {where}",
+        params,
+    )
+
+
+def rebuild_search_index(conn, table):
+    """Rebuilds `table`'s FTS index from the table contents. Runs in the caller's transaction."""
+    index = search_table(table)
+    conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def match_count_query(table):
+    """Returns the SELECT that counts matches in one domain, stopping at a cap (second parameter)."""
+    index = search_table(table)
+    return f"SELECT COUNT(*) AS matches FROM (SELECT rowid FROM {index} WHERE {index} MATCH ? LIMIT ?)"
+
+
+def search_query(table, ranked=True):
+    """
+    Returns the SELECT that finds the best matches in one domain: the domain name, id, a
+    highlighted snippet of the best matching column and the bm25 rank (lower is better).
+
+    bm25 ordering has to score every match, so for very broad terms (`ranked=False`) the
+    newest matches are returned instead; FTS5 reads those straight off the index in rowid
+    order and stops after LIMIT rows.
+    """
+    index = search_table(table)
+    return (
+        f"SELECT '{table}' AS domain, rowid AS id, "
+        f"snippet({index}, -1, '**', '**', '…', 16) AS snippet, rank "
+        f"FROM {index} WHERE {index} MATCH ? ORDER BY {'rank' if ranked else 'rowid DESC'} LIMIT ?"
+    )
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SnapshotJob:
+    """
+    Copies a live database to `dest` in a background thread.
+
+    The default mode uses the online backup API (`Connection.backup`): `pages_per_step`
+    pages are copied per step and the progress callback sleeps `pause` seconds after each
+    step that leaves pages to copy, so the copy yields the disk and CPU to live queries.
+    (`backup(sleep=...)` is not used for this: SQLite only sleeps there after a BUSY or
+    LOCKED step.) The source holds one WAL read snapshot for the whole copy, so concurrent
+    commits neither restart the backup nor leak into it. `compact=True` runs `VACUUM INTO` instead,
+    which writes a defragmented copy from one read transaction; in WAL mode that blocks
+    neither readers nor writers, but it reports no intermediate progress.
+
+    The copy is written to `<dest>.partial` and renamed into place only once complete, so
+    `dest` is never a half-written file.
+    """
+
+    def __init__(self, connect, dest, pages_per_step=256, pause=0.01, compact=False, on_progress=None):
+        self._connect = connect
+        self.dest = os.path.abspath(dest)
+        self.pages_per_step = pages_per_step
+        self.pause = pause
+        self.compact = compact
+        self.on_progress = on_progress
+        self.total_pages = None
+        self.remaining_pages = None
+        self.steps = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sqlite-snapshot", daemon=True)
+
+    def start(self):
+        """Starts the copy and returns the job."""
+        self.started_at = time.monotonic()
+        self._thread.start()
+        return self
+
+    # --- Status ---
+    @property
+    def progress(self):
+        """Fraction copied so far (0.0-1.0); None while unknown (e.g. during VACUUM INTO)."""
+        if self._done.is_set() and self.error is None:
+            return 1.0
+        if not self.total_pages:
+            return None
+        return (self.total_pages - self.remaining_pages) / self.total_pages
+
+    @property
+    def status(self):
+        """One of "running", "done" or "failed"."""
+        if not self._done.is_set():
+            return "running"
+        return "failed" if self.error is not None else "done"
+
+    def done(self):
+        """True once the copy has finished or failed."""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the job ends; returns the snapshot path or raises its error."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Snapshot to {self.dest} still running after {timeout} s")
+        if self.error is not None:
+            raise self.error
+        return self.dest
+
+    def info(self):
+        """Returns a dict describing the job, for status displays."""
+        end = self.finished_at or time.monotonic()
+        return {
+            "dest": self.dest,
+            "mode": "vacuum" if self.compact else "backup",
+            "status": self.status,
+            "progress": self.progress,
+            "pages_total": self.total_pages,
+            "pages_remaining": self.remaining_pages,
+            "steps": self.steps,
+            "elapsed_s": round(end - self.started_at, 2) if self.started_at else 0.0,
+            "size_bytes": os.path.getsize(self.dest) if self.status == "done" else None,
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+    # --- Worker Thread ---
+    def _record_progress(self, status, remaining, total):
+        self.steps += 1
+        self.remaining_pages = remaining
+        self.total_pages = total
+        if self.on_progress is not None:
+            self.on_progress(self)
+        # Called between steps, so this is where the copy is throttled
+        if remaining and self.pause:
+            time.sleep(self.pause)
+
+    def _run(self):
+        partial = f"{self.dest}.partial"
+        source = None
+        try:
+            if os.path.exists(partial):
+                os.remove(partial)
+            source = self._connect()
+            if self.compact:
+                source.execute("VACUUM INTO ?", (partial,))
+            else:
+                target = sqlite3.connect(partial)
+                try:
+                    # Pin one WAL snapshot for the whole copy: otherwise every commit by another
+                    # connection restarts the backup from page 1 and a busy database never finishes
+                    source.execute("BEGIN")
+                    source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+                    source.backup(target, pages=self.pages_per_step, progress=self._record_progress)
+                    source.rollback()
+                finally:
+                    target.close()
+            os.replace(partial, self.dest)
+        except Exception as e:
+            self.error = e
+            if os.path.exists(partial):
+                os.remove(partial)
+        finally:
+            if source is not None:
+                source.close()
+            self.finished_at = time.monotonic()
+            self._done.set()
+            if self.on_progress is not None:
+                self.on_progress(self)
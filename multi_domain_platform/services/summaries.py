@@ -0,0 +1,145 @@
+"""
+Trigger-maintained summary counters for the dashboard tiles.
+
+Each domain table has a small `<table>_summary` table holding one row per combination of
+its key columns, with the row count (and, for experiments, the sum and count of accuracy).
+INSERT/UPDATE/DELETE triggers keep it exact, so a tile is a lookup in a table of a few
+dozen rows instead of a scan of the domain table.
+
+Rebuild every summary in one pass (e.g. after a manual edit with triggers disabled):
+
+    python -m services.summaries [path/to/database.db]
+"""
+import sqlite3
+import sys
+
+# Domain table -> (key columns, numeric column whose sum/count is also kept, or None)
+SUMMARIES = {
+    "security_incidents": (["status", "severity"], None),
+    "it_tickets": (["status", "severity"], None),
+    "ml_experiments": (["model_name", "dataset", "status"], "accuracy"),
+}
+
+
+def summary_table(table):
+    """Returns the name of the summary table for `table`."""
+    return f"{table}_summary"
+
+
+def _counter_columns(value):
+    """Returns the counter column names kept for a summary with numeric column `value`."""
+    return ["row_count"] + ([f"{value}_sum", f"{value}_count"] if value else [])
+
+
+def _counter_values(value, prefix):
+    """Returns per-row SQL expressions for the counters, reading the row through `prefix`."""
+    exprs = ["1"]
+    if value:
+        exprs += [f"COALESCE({prefix}.{value}, 0)", f"({prefix}.{value} IS NOT NULL)"]
+    return exprs
+
+
+def _aggregate_values(value):
+    """Returns GROUP BY expressions that compute the counters over many rows."""
+    return ["COUNT(*)"] + ([f"TOTAL({value})", f"COUNT({value})"] if value else [])
+
+
+def _upsert_clause(keys, counters):
+    """ON CONFLICT clause adding the incoming counters to an existing summary row."""
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in counters)
+    return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+
+
+def create_summary_table(conn, table):
+    """Creates the summary table for `table` if it does not exist yet."""
+    keys, value = SUMMARIES[table]
+    counters = _counter_columns(value)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {summary_table(table)} (
+            {", ".join(f"{key} TEXT NOT NULL" for key in keys)},
+            {", ".join(f"{column} {'REAL' if column.endswith('_sum') else 'INTEGER'} NOT NULL DEFAULT 0" for column in counters)},
+            PRIMARY KEY ({", ".join(keys)})
+        ) WITHOUT ROWID;
+    ''')
+
+
+def create_summary_trigger(conn, table, event):
+    """Creates the trigger that keeps `table`'s summary exact for `event` (INSERT, UPDATE or DELETE)."""
+    keys, value = SUMMARIES[table]
+    summary = summary_table(table)
+    counters = _counter_columns(value)
+
+    add = (
+        f"INSERT INTO {summary} ({', '.join(keys + counters)}) "
+        f"VALUES ({', '.join([f'NEW.{key}' for key in keys] + _counter_values(value, 'NEW'))}) "
+        f"{_upsert_clause(keys, counters)};"
+    )
+    subtract = (
+        f"UPDATE {summary} SET "
+        + ", ".join(f"{column} = {column} - {expr}" for column, expr in zip(counters, _counter_values(value, "OLD")))
+        + " WHERE " + " AND ".join(f"{key} = OLD.{key}" for key in keys) + ";"
+    )
+
+    watched = keys + ([value] if value else [])
+    if event == "INSERT":
+        header, body = f"AFTER INSERT ON {table}", add
+    elif event == "DELETE":
+        header, body = f"AFTER DELETE ON {table}", subtract
+    else:
+        # Only changes to the summarised columns move a row between counters
+        changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in watched)
+        header = f"AFTER UPDATE OF {', '.join(watched)} ON {table} WHEN {changed}"
+        body = f"{subtract}\n            {add}"
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_summary_{event.lower()}
+        {header}
+        BEGIN
+            {body}
+        END;
+    ''')
+
+
+def add_rows_to_summary(conn, table, where="1", params=()):
+    """Adds the rows of `table` matching `where` to its summary with one GROUP BY pass."""
+    keys, value = SUMMARIES[table]
+    counters = _counter_columns(value)
+    conn.execute(
+        f"INSERT INTO {summary_table(table)} ({', '.join(keys + counters)}) "
+        f"SELECT {', '.join(keys + _aggregate_values(value))} FROM {table} WHERE {where} "
+        f"GROUP BY {', '.join(keys)} {_upsert_clause(keys, counters)}",
+        params,
+    )
+
+
+def rebuild_summary(conn, table):
+    """Recomputes `table`'s summary from scratch. Runs in the caller's transaction."""
+    conn.execute(f"DELETE FROM {summary_table(table)}")
+    add_rows_to_summary(conn, table)
+
+
+def rebuild_all(conn):
+    """Recomputes every summary in a single transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for table in SUMMARIES:
+            rebuild_summary(conn, table)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+if __name__ == "__main__":
+    from services.migrations import migrate
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "intelligence_platform.db"
+    connection = sqlite3.connect(db_path)
+    try:
+        # Make sure the summary tables exist before rebuilding them
+        migrate(connection)
+        rebuild_all(connection)
+        for name in SUMMARIES:
+            total = connection.execute(f"SELECT COALESCE(SUM(row_count), 0) FROM {summary_table(name)}").fetchone()[0]
+            print(f"Rebuilt {summary_table(name)}: {total} rows summarised")
+    finally:
+        connection.close()
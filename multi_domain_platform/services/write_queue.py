@@ -0,0 +1,185 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """
+    Single-writer queue with group commit.
+
+    Every write for one database file is handed to a dedicated writer thread that owns
+    the only writing connection. While one group is being committed the next one queues
+    up; the thread then drains it as a group of up to `max_batch` statements (optionally
+    waiting up to `max_delay` seconds for more to arrive) and commits it once. No two sessions contend for SQLite's write lock, and N
+    concurrent writes cost one fsync instead of N. Each statement runs under its own
+    SAVEPOINT, so a failing statement only fails its own future. Any other error fails
+    the futures of the group it hit and the thread carries on with the next group;
+    requests whose future was cancelled before their group started are skipped.
+    """
+
+    # One writer per connection pool (and therefore per database file)
+    _queues = {}
+    _queues_lock = threading.Lock()
+
+    _STOP = object()
+
+    def __init__(self, pool, max_batch=100, max_delay=0.0, on_commit=None):
+        self._pool = pool
+        # Called with each successfully committed statement before its future resolves
+        self.on_commit = on_commit
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._groups = 0
+        self._statements = 0
+        self._failed = 0
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_pool(cls, pool, **kwargs):
+        """Returns the shared writer for `pool`, starting it on first use."""
+        with cls._queues_lock:
+            writer = cls._queues.get(pool)
+            if writer is None:
+                writer = cls(pool, **kwargs)
+                cls._queues[pool] = writer
+                atexit.register(writer.stop)
+            return writer
+
+    # --- Public API ---
+    def submit(self, query, params=()):
+        """Queues a write and returns a Future resolving to (rowcount, lastrowid)."""
+        future = Future()
+        self._queue.put((query, params, future))
+        return future
+
+    def stop(self, timeout=5.0):
+        """Flushes queued writes and stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Returns counters describing how well writes are being grouped."""
+        with self._stats_lock:
+            return {
+                "groups_committed": self._groups,
+                "statements": self._statements,
+                "failed_statements": self._failed,
+                "avg_group_size": round(self._statements / self._groups, 2) if self._groups else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+    # --- Writer Thread ---
+    def _collect_group(self, first):
+        """
+        Gathers up to max_batch requests: everything already queued, then (if max_delay is
+        set) whatever arrives within max_delay seconds of the first request.
+        """
+        group = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(group) < self.max_batch and group[-1] is not self._STOP:
+            try:
+                group.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                group.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return group
+
+    def _run(self):
+        try:
+            conn = self._pool.connect_unpooled()
+        except Exception as e:
+            # No write can succeed without a connection; fail requests instead of leaving them waiting
+            logger.exception("Writer thread could not open a connection")
+            conn, connect_error = None, e
+        try:
+            while True:
+                group = self._collect_group(self._queue.get())
+                stopping = group[-1] is self._STOP
+                # A future cancelled while queued is dropped; the rest are marked running
+                requests = [
+                    item for item in group
+                    if item is not self._STOP and item[2].set_running_or_notify_cancel()
+                ]
+                if requests:
+                    if conn is None:
+                        self._fail(requests, connect_error)
+                    else:
+                        try:
+                            self._commit_group(conn, requests)
+                        except Exception as e:
+                            # Keep the writer alive: fail this group only and move on
+                            logger.exception("Write group failed")
+                            self._fail(requests, e)
+                if stopping:
+                    break
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _fail(self, requests, error):
+        """Fails every still-pending future in `requests` with `error`."""
+        for _, _, future in requests:
+            if not future.done():
+                future.set_exception(error)
+        with self._stats_lock:
+            self._failed += len(requests)
+
+    def _commit_group(self, conn, requests):
+        """Runs one group of writes in a single transaction and resolves their futures."""
+        results = []
+        failed = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for query, params, future in requests:
+                conn.execute("SAVEPOINT write_request")
+                try:
+                    cursor = conn.execute(query, params)
+                    results.append((future, (cursor.rowcount, cursor.lastrowid), None))
+                    conn.execute("RELEASE SAVEPOINT write_request")
+                except Exception as e:
+                    # Includes binding errors (e.g. unsupported parameter types), not just sqlite3.Error
+                    conn.execute("ROLLBACK TO SAVEPOINT write_request")
+                    conn.execute("RELEASE SAVEPOINT write_request")
+                    results.append((future, None, e))
+                    failed += 1
+            conn.commit()
+        except Exception:
+            # The group as a whole could not be committed; the caller fails every request in it
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+        # Results are only published once the commit has succeeded (and caches have been told)
+        if self.on_commit is not None:
+            for (query, _, _), (_, _, error) in zip(requests, results):
+                if error is None:
+                    try:
+                        self.on_commit(query)
+                    except Exception:
+                        # The write is committed either way; don't fail its future over a callback
+                        logger.exception("on_commit callback failed for: %s", query)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        with self._stats_lock:
+            self._groups += 1
+            self._statements += len(requests)
+            self._failed += failed
@@ -1,6 +1,7 @@
 import streamlit as st
 # NOTE: Assuming the import path below is correct for your file structure
-from auth import login_user,register_user, validate_username, validate_password # Added imports
+from auth import login_user,register_user, validate_username, validate_password, AuthBusyError, AuthRateLimitedError # Added imports
+import math
 import os
 import sys
 
@@ -42,7 +43,16 @@ with tab_login:
 
     if st.button("Log in", type="primary"):
         # Using the secure login_user function from auth.py
-        if login_user(login_username, login_password):
+        try:
+            # The client address (when Streamlit knows it) gets its own attempt budget
+            logged_in = login_user(login_username, login_password, client=getattr(st.context, "ip_address", None))
+        except AuthRateLimitedError as e:
+            st.warning(f"{e} Try again in {math.ceil(e.retry_after)} s.")
+            st.stop()
+        except AuthBusyError:
+            st.warning("The server is handling many logins right now. Please try again in a few seconds.")
+            st.stop()
+        if logged_in:
             st.session_state.logged_in = True
             st.session_state.username = login_username
             st.success(f"Welcome back, {login_username}! ")
@@ -84,7 +94,12 @@ with tab_register:
             if ok_u and ok_p:
                 # Use the register_user function, which handles hashing and saving to users.txt
                 # Note: register_user also internally checks if the user exists.
-                if register_user(new_username, new_password):
+                try:
+                    registered = register_user(new_username, new_password)
+                except AuthBusyError:
+                    st.warning("The server is busy right now. Please try again in a few seconds.")
+                    st.stop()
+                if registered:
                     st.success("Account created! You can now log in from the Login tab.")
                     st.info("Tip: go to the Login tab and sign in with your new account.")
                 else:
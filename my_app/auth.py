@@ -1,9 +1,54 @@
 from pathlib import Path
+from collections import Counter
+import os
 import re
-import bcrypt
+import sys
+import threading
+
+# The project root holds multi_domain_platform, whose bcrypt pool and rate limiter are reused here
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from multi_domain_platform.services.password_hasher import HasherBusyError, HasherTimeoutError, PasswordHasher
+from multi_domain_platform.services.rate_limiter import RateLimitedError, TokenBucketLimiter
 
 USER_DATA_FILE = Path("users.txt")
 
+# bcrypt runs on the process-wide bounded worker pool, never on the Streamlit script thread
+_hasher = PasswordHasher.shared()
+
+
+class AuthBusyError(Exception):
+    """Raised when too many password checks are pending or one does not finish in time."""
+
+
+# Raised when a username or client has used up its login attempts; `retry_after` is in seconds
+AuthRateLimitedError = RateLimitedError
+
+
+# --- Login rate limits (token buckets) ---
+# 5 attempts per username then one every 30 s, 20 per client then one every 3 s.
+# Limited attempts are rejected before any bcrypt work.
+_username_limiter = TokenBucketLimiter.shared("my_app_login_username", capacity=5, refill_rate=1 / 30)
+_client_limiter = TokenBucketLimiter.shared("my_app_login_client", capacity=20, refill_rate=1 / 3)
+
+LOGIN_COUNTERS = Counter()
+_counters_lock = threading.Lock()
+
+
+def login_stats() -> dict:
+    """
+    Returns the login counters (succeeded, failed, rejected_client, rejected_username,
+    rejected_busy) plus the limiter and bcrypt pool stats (latency percentiles included).
+    """
+    with _counters_lock:
+        stats = dict(LOGIN_COUNTERS)
+    stats["username_limiter"] = _username_limiter.stats()
+    stats["client_limiter"] = _client_limiter.stats()
+    stats["bcrypt_pool"] = _hasher.stats()
+    return stats
+
 # --- Auto-create file + show full path ---
 if not USER_DATA_FILE.exists():
     USER_DATA_FILE.touch()
@@ -12,19 +57,21 @@ else:
     print(f"[INFO] Using existing file: {USER_DATA_FILE.resolve()}")
 
 
+def _run_bcrypt(method, *args):
+    """Runs a PasswordHasher call; raises AuthBusyError if the pool is full or too slow."""
+    try:
+        return method(*args)
+    except (HasherBusyError, HasherTimeoutError) as e:
+        _count("rejected_busy")
+        raise AuthBusyError(str(e)) from None
+
 def hash_password(plain_text_password: str) -> str:
     """Return bcrypt hash (utf-8 str) of the given password."""
-    password_bytes = plain_text_password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password_bytes, salt)
-    return hashed_password.decode("utf-8")
+    return _run_bcrypt(_hasher.hash, plain_text_password)
 
 def verify_password(plain_text_password: str, hashed_password: str) -> bool:
     """Check plaintext vs stored bcrypt hash."""
-    return bcrypt.checkpw(
-        plain_text_password.encode("utf-8"),
-        hashed_password.encode("utf-8"),
-    )
+    return _run_bcrypt(_hasher.check, plain_text_password, hashed_password)
 
 def user_exists(username: str) -> bool:
     """Check if a username already exists in users.txt (exact match)."""
@@ -63,7 +110,25 @@ def register_user(username: str, password: str) -> bool:
     print(f"User '{username}' registered.")
     return True
 
-def login_user(username: str, password: str) -> bool:
+def _count(outcome):
+    with _counters_lock:
+        LOGIN_COUNTERS[outcome] += 1
+
+def login_user(username: str, password: str, client: str = None) -> bool:
+    """
+    Check a login. Raises AuthRateLimitedError when the client (if given) or the username
+    has no attempts left, and AuthBusyError when bcrypt capacity is exhausted.
+    """
+    if client:
+        retry_after = _client_limiter.try_acquire(client)
+        if retry_after:
+            _count("rejected_client")
+            raise AuthRateLimitedError("Too many login attempts from this client.", retry_after)
+    retry_after = _username_limiter.try_acquire(username.lower())
+    if retry_after:
+        _count("rejected_username")
+        raise AuthRateLimitedError("Too many login attempts for this username.", retry_after)
+
     if not USER_DATA_FILE.exists():
         print("No users registered yet.")
         return False
@@ -77,12 +142,17 @@ def login_user(username: str, password: str) -> bool:
             if saved_username == username:
                 if verify_password(password, saved_hash):
                     print(f"Success: Welcome, {username}!")
+                    # A successful login clears earlier mistyped attempts
+                    _username_limiter.reset(username.lower())
+                    _count("succeeded")
                     return True
                 else:
                     print("Incorrect password.")
+                    _count("failed")
                     return False
 
     print(f"Username '{username}' was not found.")
+    _count("failed")
     return False
 
 def validate_username(username: str) -> tuple[bool, str]:
@@ -145,13 +215,24 @@ def main():
                 print("Error: Passwords do not match.")
                 continue
 
-            register_user(username, password)
+            try:
+                register_user(username, password)
+            except AuthBusyError as e:
+                print(f"Error: {e} Please try again shortly.")
 
         elif choice == "2":
             print("\n--- USER LOGIN ---")
             username = input("Enter your username: ").strip()
             password = input("Enter your password: ").strip()
-            if login_user(username, password):
+            try:
+                logged_in = login_user(username, password)
+            except AuthRateLimitedError as e:
+                print(f"Error: {e} Try again in {e.retry_after:.0f} s.")
+                continue
+            except AuthBusyError as e:
+                print(f"Error: {e} Please try again shortly.")
+                continue
+            if logged_in:
                 print("\nYou are now logged in.")
                 input("\nPress Enter to return to the main menu...")
 